@@ -1,11 +1,27 @@
+# O servidor do Socket.IO roda em modo gevent: as threads do UploadScheduler, os timers do
+# RemittanceBuffer e os sockets (e-Cidade, FTP) precisam ser cooperativos para que os eventos
+# emitidos por eles sejam entregues imediatamente, e não apenas no próximo long-polling
+from gevent import monkey
+
+monkey.patch_all()
+
 import os
 
-from socket_io import socketio
+from werkzeug.serving import is_running_from_reloader
+
+from socket_io import resume_jobs, socketio
 from views import app
 
 def string_to_bool(s):
     return s.lower() == "true"
 
+# Retoma os envios interrompidos (incluídos no e-Cidade, mas não enviados por FTP) ao carregar
+# a aplicação, qualquer que seja o launcher (python app.py, flask run ou servidor WSGI). No
+# modo debug, apenas o processo que atende as requisições retoma os envios, e não o processo
+# pai do recarregador.
+if not app.debug or is_running_from_reloader():
+    resume_jobs()
+
 if __name__ == "__main__":
     host = os.getenv("FLASK_RUN_HOST", "0.0.0.0")
     port = int(os.getenv("FLASK_RUN_PORT", 5001))
@@ -0,0 +1,329 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from generate import TextAR
+from models.response_data import ResponseData
+from utils.case_converter import CaseConverter
+from utils.cpf_cnpj import validate_document, validate_many
+from utils.format_string_with_mask import format_many, format_string_with_mask
+from utils.object_code import object_codes
+
+def ecidade_response(number=1234567):
+    "Resposta sintética da inclusão no e-Cidade (formato esperado por ResponseData)."
+    return {
+        "data": {
+            "dados_cliente": {"identificador": "ABCD", "codigo_cliente": 1234},
+            "dados_devolucao": {
+                "nome": "Prefeitura Municipal",
+                "cep_devolucao": "71937720",
+                "logradouro_devolucao": "Rua das Flores",
+                "numero_devolucao": "100",
+                "complemento_devolucao": "Bloco B",
+                "bairro_devolucao": "Centro",
+                "cidade_devolucao": "Brasília",
+                "uf_devolucao": "DF"
+            },
+            "dados_carta": {
+                "sigla_objeto": "SR",
+                "numero_objeto": number,
+                "lote": 12,
+                "nome": "José da Silva",
+                "cep": "71937720",
+                "logradouro": "Avenida Central",
+                "numero": "42",
+                "complemento": "Apto 101",
+                "bairro": "Asa Sul",
+                "cidade": "Brasília",
+                "uf": "DF"
+            }
+        }
+    }
+
+def recipients(count):
+    return [ResponseData(ecidade_response(number)).get_data()["recipient-data"] for number in range(count)]
+
+def return_file(path, count, seed=0):
+    "Grava um arquivo de retorno sintético com 'count' registros de detalhe."
+    rnd = random.Random(seed)
+    codes = ["01", "02", "18", "99", "21", "71", "00"]
+
+    def text(value, length):
+        return str(value)[:length].ljust(length)
+
+    def number(value, length):
+        return str(value).rjust(length, "0")
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("0" + number(1234, 4) + "0" * 15 + text("PREFEITURA MUNICIPAL", 40) + "20240105" + "20240106" + " " * 83 + number(7, 5) + number(1, 6))
+
+        for index in range(count):
+            file.write(
+                "\n1" + number(1234, 4) + text("ABCD", 8) + "SR" + number(rnd.randint(0, 99999999), 9) + "BR"
+                + text(f"AR {index}", 60) + f"2024{rnd.randint(1, 12):02d}{rnd.randint(1, 28):02d}" + rnd.choice(codes)
+                + text("LOTE12", 8) + text(f"RECEBEDOR {index}", 40) + number(rnd.randint(0, 10 ** 9), 12)
+                + rnd.choice(codes) + " " + number(7, 5) + number(index + 2, 6)
+            )
+
+        file.write("\n2" + number(1234, 4) + "0" * 15 + text("PREFEITURA MUNICIPAL", 40) + number(count, 6) + " " * 93 + number(7, 5) + number(count + 2, 6) + "\n")
+
+def measure(name, fn, items=1, repeat=5, setup=None):
+    """
+    Executa 'fn' 'repeat' vezes e mede o tempo de cada execução (mínimo, mediana e máximo), a
+    vazão e o pico de memória. Com poucas execuções não há percentis: use measure_calls para a
+    latência por chamada.
+
+    Args:
+        name (str): Nome do caso.
+        fn (function): Função medida; recebe o retorno de 'setup' (quando houver).
+        items (int, optional): Itens processados por execução (usado na vazão).
+        repeat (int, optional): Quantidade de execuções medidas.
+        setup (function, optional): Preparação executada antes de cada execução, fora da medição.
+
+    Returns:
+        dict: Resultado do caso.
+    """
+    def run():
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        fn(*args)
+
+        return time.perf_counter() - start
+
+    # Aquecimento
+    run()
+
+    latencies = sorted(run() for _ in range(repeat))
+
+    # Pico de memória em uma execução separada, pois o tracemalloc distorce os tempos
+    args = () if setup is None else (setup(),)
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total = sum(latencies)
+
+    result = {
+        "name": name,
+        "items": items,
+        "repeat": repeat,
+        "min_ms": latencies[0] * 1000,
+        "median_ms": latencies[len(latencies) // 2] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "throughput": items * repeat / total if total else None,
+        "peak_memory_bytes": peak
+    }
+
+    print(f"{name:<45} mediana {result['median_ms']:>10.3f} ms  máx {result['max_ms']:>10.3f} ms  "
+          f"{result['throughput'] or 0:>14,.0f} itens/s  pico {peak / 1024:>10,.0f} KB  ({repeat} execuções)")
+
+    return result
+
+def measure_calls(name, fn, inputs, repeat=5):
+    """
+    Mede a latência de cada chamada 'fn(item)' (percentis sobre todas as chamadas), a vazão e o
+    pico de memória.
+
+    Args:
+        name (str): Nome do caso.
+        fn (function): Função medida, chamada uma vez por item.
+        inputs (list): Itens passados a 'fn'.
+        repeat (int, optional): Quantidade de passagens pelos itens.
+
+    Returns:
+        dict: Resultado do caso.
+    """
+    clock = time.perf_counter_ns
+
+    # Aquecimento
+    for item in inputs:
+        fn(item)
+
+    latencies = []
+
+    for _ in range(repeat):
+        for item in inputs:
+            start = clock()
+            fn(item)
+            latencies.append(clock() - start)
+
+    latencies.sort()
+
+    tracemalloc.start()
+
+    for item in inputs:
+        fn(item)
+
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))] / 1000
+
+    total = sum(latencies) / 10 ** 9
+
+    result = {
+        "name": name,
+        "items": len(inputs),
+        "repeat": repeat,
+        "p50_us": percentile(50),
+        "p99_us": percentile(99),
+        "max_us": latencies[-1] / 1000,
+        "throughput": len(latencies) / total if total else None,
+        "peak_memory_bytes": peak
+    }
+
+    print(f"{name:<45} p50 {result['p50_us']:>10.3f} µs  p99 {result['p99_us']:>10.3f} µs  "
+          f"{result['throughput'] or 0:>14,.0f} itens/s  pico {peak / 1024:>10,.0f} KB  (por chamada)")
+
+    return result
+
+def bench_generate(count, directory, repeat):
+    text_ar = TextAR(ResponseData(ecidade_response()).get_data())
+    details = recipients(count)
+
+    def setup():
+        return [dict(detail) for detail in details]
+
+    def run(data):
+        if text_ar.generate(details=data, directory=directory) is False:
+            raise RuntimeError("Falha na geração do arquivo SD1.")
+
+    return measure(f"TextAR.generate ({count} destinatários)", run, count, repeat, setup)
+
+def bench_get_data(count, directory, repeat):
+    path = os.path.join(directory, f"retorno_{count}.txt")
+    return_file(path, count)
+
+    results = [
+        measure(f"TextAR.get_data ({count} detalhes)", lambda: TextAR().get_data(path), count, repeat),
+        measure(f"TextAR.get_data registros ({count} detalhes)", lambda: TextAR().get_data(path, records=True), count, repeat)
+    ]
+
+    try:
+        import numpy
+    except ImportError:
+        return results
+
+    columns = ["numero_do_objeto", "codigo_da_baixa", "motivo_devolucao", "data_da_entrega_do_ar"]
+    results.append(measure(f"TextAR.get_data colunar ({count} detalhes)", lambda: TextAR().get_data(path, True, columns), count, repeat))
+
+    return results
+
+def bench_validate_document(repeat):
+    documents = ["845.882.361-64", "84588236164", "11.222.333/0001-81", "11222333000181", "123.456.789-00", "00000000000"] * 1000
+
+    return [
+        measure_calls("validate_document", validate_document, documents, repeat),
+        measure("validate_many", lambda: validate_many(documents), len(documents), repeat)
+    ]
+
+def bench_format_string_with_mask(repeat):
+    values = ["71937720", "84588236164", "11222333000181", 71937720] * 1000
+
+    return [
+        measure_calls("format_string_with_mask", format_string_with_mask, values, repeat),
+        measure("format_many (CEP)", lambda: format_many(values, "CEP"), len(values), repeat)
+    ]
+
+def bench_convert_keys(repeat):
+    data = [ResponseData(ecidade_response(number)).get_data() for number in range(1000)]
+
+    return measure("CaseConverter.convert_keys", lambda: CaseConverter.convert_keys(data, CaseConverter.to_camel_case), len(data), repeat)
+
+def bench_response_data(repeat):
+    responses = [ecidade_response(number) for number in range(1000)]
+
+    return measure("ResponseData.get_data", lambda: [ResponseData(response).get_data() for response in responses], len(responses), repeat)
+
+def bench_object_codes(count, repeat):
+    numbers = [str(number) for number in range(count)]
+    results = [measure_calls(f"calculate_verification_digit ({count} números)", lambda number: ResponseData.calculate_verification_digit(None, number), numbers, repeat)]
+
+    try:
+        import numpy
+    except ImportError:
+        return results
+
+    results.append(measure(f"object_codes ({count} números)", lambda: object_codes("SR", 0, count), count, repeat))
+
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def compare(results, baseline_path):
+    "Compara a mediana de cada caso (por execução ou por chamada) com um resultado salvo anteriormente."
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {result["name"]: result for result in json.load(file)["results"]}
+
+    print(f"\nComparação com {baseline_path}:")
+
+    for result in results:
+        previous = baseline.get(result["name"])
+        key = "median_ms" if "median_ms" in result else "p50_us"
+
+        if previous is None or not previous.get(key):
+            continue
+
+        ratio = result[key] / previous[key]
+
+        print(f"{result['name']:<45} {ratio:>6.2f}x {'(regressão)' if ratio > 1.1 else ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks da geração, leitura e validação de ARs.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="Arquivo JSON de saída.")
+    parser.add_argument("-c", "--compare", default=None, help="Resultado anterior (JSON) para comparação.")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Execuções medidas por caso.")
+    parser.add_argument("--quick", action="store_true", help="Ignora os casos de 100 mil registros.")
+    args = parser.parse_args()
+
+    # O log dos spans de cada geração distorceria as medições
+    os.environ.setdefault("TRACE_LOG", "false")
+
+    sizes = [1, 1000] if args.quick else [1, 1000, 100000]
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            results.append(bench_generate(size, directory, args.repeat if size < 100000 else 3))
+
+        for size in sizes[1:]:
+            results.extend(bench_get_data(size, directory, args.repeat if size < 100000 else 3))
+
+    results.extend(bench_validate_document(args.repeat))
+    results.extend(bench_format_string_with_mask(args.repeat))
+    results.append(bench_convert_keys(args.repeat))
+    results.append(bench_response_data(args.repeat))
+    results.extend(bench_object_codes(100000, args.repeat))
+
+    report = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4, ensure_ascii=False)
+
+    print(f"\nResultados salvos em {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
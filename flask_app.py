@@ -1,13 +1,14 @@
 import os
 import traceback
 
-from flask import Flask, jsonify, render_template
+from flask import Flask, Response, jsonify, render_template
 
 
 class FlaskApp(Flask):
     def setup(self):
         self.secret_key = os.getenv("FLASK_SECRET_KEY", "SMF_AR")
         self.configure_error_handlers()
+        self.configure_metrics()
         self.assets_build()
 
     def get_asset_files(self, ext):
@@ -65,6 +66,14 @@ class FlaskApp(Flask):
         def server_error_page(error):
             return render_template("http/server_error.html"), 500
 
+    def configure_metrics(self):
+        from metrics import registry
+
+        # Durações e erros de cada etapa do envio, no formato texto do Prometheus
+        @self.route("/metrics")
+        def metrics():
+            return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
     def error(self, message):
         data = {
             "erro": True,
@@ -0,0 +1,103 @@
+import os
+from contextlib import contextmanager
+from ftplib import FTP, all_errors
+from queue import Empty, Full, LifoQueue
+from threading import BoundedSemaphore
+
+from metrics import timed
+
+if "FLASK_APP" not in os.environ:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+class FTPPool():
+    "Pool de sessões FTP autenticadas, reaproveitadas entre as threads de envio."
+
+    def __init__(self, host=None, user=None, password=None, port=None, size=None, timeout=None):
+        size = size or int(os.getenv("FTP_POOL_SIZE", 4))
+
+        self.host = host or os.getenv("FTP_SERVER_HOST")
+        self.user = user or os.getenv("FTP_SERVER_USER")
+        self.password = password or os.getenv("FTP_SERVER_PASS")
+        self.port = int(port or os.getenv("FTP_SERVER_PORT") or 21)
+        self.timeout = timeout or int(os.getenv("FLASK_CONNECTION_TIMEOUT", 10))
+
+        # Sessões ociosas (a mais recente é reutilizada primeiro) e limite de sessões abertas
+        self._idle = LifoQueue(maxsize=size)
+        self._slots = BoundedSemaphore(size)
+
+    def _connect(self):
+        with timed("ftp_connect"):
+            ftp = FTP(timeout=self.timeout)
+            ftp.connect(self.host, self.port)
+            ftp.login(self.user, self.password)
+
+        return ftp
+
+    def _is_alive(self, ftp):
+        try:
+            ftp.voidcmd("NOOP")
+
+            return True
+        except all_errors:
+            return False
+
+    def _close(self, ftp):
+        try:
+            ftp.quit()
+        except all_errors:
+            ftp.close()
+
+    def acquire(self):
+        "Retorna uma sessão ociosa que responda ao NOOP ou abre uma nova (bloqueia se o pool estiver cheio)."
+        self._slots.acquire()
+
+        try:
+            while True:
+                try:
+                    ftp = self._idle.get_nowait()
+                except Empty:
+                    return self._connect()
+
+                if self._is_alive(ftp):
+                    return ftp
+
+                self._close(ftp)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, ftp, discard=False):
+        "Devolve a sessão ao pool ou a encerra quando 'discard' é verdadeiro."
+        try:
+            if discard:
+                self._close(ftp)
+            else:
+                self._idle.put_nowait(ftp)
+        except Full:
+            self._close(ftp)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def session(self):
+        "Empresta uma sessão do pool; sessões interrompidas por erro são descartadas."
+        ftp = self.acquire()
+
+        try:
+            yield ftp
+        except BaseException:
+            self.release(ftp, discard=True)
+            raise
+        else:
+            self.release(ftp)
+
+    def close(self):
+        "Encerra todas as sessões ociosas."
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except Empty:
+                break
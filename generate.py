@@ -1,271 +1,568 @@
+import codecs
+import mmap
 import os
 import re
 from datetime import datetime
 
 from unidecode import unidecode
 
-from table import Table
+from layout import Field, RecordLayout, decode_numbers
+from metrics import timed
+from models.records import AddressData, ARData, ReturnDetail, ReturnHeader, ReturnTrailer, SD1Detail
+from tracing import span
+from table import discharge_reasons, return_reasons, table
 
+_write_buffer_size = 64 * 1024
 
-class TextAR:
-    def __init__(self, data=None):
-        self._registration_amount = 0
-        self._shipping = None
-        self._sequential = 1
-        self._data = []
-        self._txt = ""
+# Posições dos campos tratados após a leitura dos registros de retorno
+_movement_date = ReturnHeader._fields.index("data_do_movimento")
+_generation_date = ReturnHeader._fields.index("data_da_geracao")
+_delivery_date = ReturnDetail._fields.index("data_da_entrega_do_ar")
+_discharge_code = ReturnDetail._fields.index("codigo_da_baixa")
+_return_reason = ReturnDetail._fields.index("motivo_devolucao")
 
-        self.date = datetime.now()
-
-        self.table = Table()
-
-        self.info = None
+# O codec "ANSI" (página de código do Windows) não existe nos demais sistemas; usa o equivalente cp1252
+try:
+    _file_encoding = codecs.lookup("ANSI").name
+except LookupError:
+    _file_encoding = "cp1252"
 
-        if data is not None:
-            self.client_acronym = data.get("client-acronym")
-            self.info = data.get("object-data")
-
-            self._shipping = self.info.get("shipping")
-
-            self.set_data([data.get("recipient-data")])
-
-    def _txt270(self):
-        self.txt270 = "•" * 270
-
-    def _update_txt(self):
-        if (not self._txt):
-            self._txt = self.txt270
-        else:
-            self._txt += f"\n{self.txt270}"
-
-        self._sequential += 1
-
-    def _set_header(self):
-        self._txt270()
 
+class TextAR:
+    HEADER = RecordLayout([
         # Tipo de registro (8)
-        self.set_text(8, 1, 1, 0)
+        Field("tipo_de_registro", 1, 1, numeric=True, value=8),
 
         # Código do cliente (a ser definido pelos Correios)
-        self.set_text(self.info.get("client-code"), 2, 5, 0)
+        Field("codigo_do_cliente", 2, 5, numeric=True),
 
         # Filler (preencher com zeros)
-        self.set_text(0, 6, 20, 0)
+        Field("filler", 6, 20, numeric=True, value=0),
 
         # Nome do cliente
-        self.set_text(self.info.get("client-name"), 21, 60)
+        Field("nome_do_cliente", 21, 60),
 
         # Data geração (data de geração do arquivo)
-        self.set_text(self.date.strftime("%Y%m%d"), 61, 68)
+        Field("data_de_geracao", 61, 68),
 
         # Quantidade de registro (quantidade de registro do arquivo, inclui o Registro Header)
-        self.set_text(self._registration_amount, 69, 74, 0)
+        Field("quantidade_de_registros", 69, 74, numeric=True),
 
         # Filler (preencher com zeros)
-        self.set_text("0", 75, 258, 0)
+        Field("filler2", 75, 258, numeric=True, value=0),
 
         # Número sequencial de arquivo (número de remessa de arquivo - sequencial de remessa de arquivo)
-        self.set_text(self._shipping, 259, 263, 0)
+        Field("numero_sequencial_arquivo", 259, 263, numeric=True),
 
         # Número sequencial de registro (Sequencial de registro, a partir de 0000001)
-        self.set_text(self._sequential, 264, 270, 0)
-
-        self._update_txt()
-
-    def _set_detail(self, detail):
-        self._txt270()
+        Field("numero_sequencial_registro", 264, 270, numeric=True)
+    ], 270)
+    "Layout do registro Header do arquivo SD1"
 
+    DETAIL = RecordLayout([
         # Tipo de registro (9)
-        self.set_text(9, 1, 1)
+        Field("tipo_de_registro", 1, 1, value=9),
 
         # Código do cliente (a ser definido pelos Correios)
-        self.set_text(self.info.get("client-code"), 2, 5, 0)
+        Field("codigo_do_cliente", 2, 5, numeric=True),
 
         # Identificador do cliente (Literal fornecido pelos Correios)
-        self.set_text(self.info.get("client-identifier"), 6, 13)
+        Field("identificador_do_cliente", 6, 13),
 
         # Sigla do objeto (tipo postal)
-        self.set_text(self.info.get("object-acronym"), 14, 15)
+        Field("sigla_do_objeto", 14, 15),
 
         # Número do objeto (faixas fornecidas pelos Correios sem o DV, o cliente deve gera-lo)
-        self.set_text(self.info.get("object-number"), 16, 24, 0)
+        Field("numero_do_objeto", 16, 24, numeric=True),
 
         # País de origem (fixo = BR)
-        self.set_text("BR", 25, 36)
+        Field("pais_de_origem", 25, 26, value="BR"),
 
         # Código da operação (1101 - inclusão, 1102 - exclusão)
-        self.set_text(self._type, 27, 30)
+        Field("codigo_da_operacao", 27, 30),
 
         # Conteúdo (livre para o usuário)
-        self.set_text(self.info.get("free-content"), 31, 90)
+        Field("conteudo", 31, 90),
 
         # Nome destinatário
-        self.set_text(detail["name"], 91, 130)
+        Field("nome_destinatario", 91, 130),
 
         # Endereço destinatário
-        self.set_text(detail["address"], 131, 210)
+        Field("endereco_destinatario", 131, 210),
 
         # Cidade destinatário
-        self.set_text(detail["city"], 211, 240)
+        Field("cidade_destinatario", 211, 240),
 
         # UF destinatário
-        self.set_text(detail["state"], 241, 242)
+        Field("uf_destinatario", 241, 242),
 
         # CEP destinatário
-        self.set_text(re.sub(r'[^0-9]', '', detail["zip-code"]), 243, 250, 0)
+        Field("cep_destinatario", 243, 250, numeric=True),
 
         # Filler (preencher com zeros)
-        self.set_text(0, 251, 258, 0)
+        Field("filler", 251, 258, numeric=True, value=0),
 
         # Número sequencial de arquivo (número de remessa de arquivo - sequencial de remessa de arquivo)
-        self.set_text(self._shipping, 259, 263, 0)
+        Field("numero_sequencial_arquivo", 259, 263, numeric=True),
 
         # Número sequencial de registro (Sequencial de registro, a partir de 0000002)
-        self.set_text(self._sequential, 264, 270, 0)
-
-        self._update_txt()
+        Field("numero_sequencial_registro", 264, 270, numeric=True)
+    ], 270)
+    "Layout do registro Detalhe do arquivo SD1"
+
+    RETURN_HEADER = RecordLayout([
+        Field("tipo_de_registro", 1, 1, numeric=True),
+        Field("codigo_do_cliente", 2, 5, numeric=True),
+        Field("filler", 6, 20),
+        Field("nome_do_cliente", 21, 60),
+        Field("data_do_movimento", 61, 68),
+        Field("data_da_geracao", 69, 76),
+        Field("filler2", 77, 159),
+        Field("numero_sequencial_arquivo", 160, 164, numeric=True),
+        Field("numero_sequencial_registro", 165, 170, numeric=True)
+    ], 170)
+    "Layout do registro Header (0) do arquivo de retorno"
+
+    RETURN_DETAIL = RecordLayout([
+        Field("tipo_de_registro", 1, 1, numeric=True),
+        Field("codigo_do_cliente", 2, 5, numeric=True),
+        Field("identificacao_do_cliente", 6, 13),
+        Field("sigla_do_objeto", 14, 15),
+        Field("numero_do_objeto", 16, 24, numeric=True),
+        Field("pais_de_origem", 25, 26),
+        Field("conteudo", 27, 86),
+        Field("data_da_entrega_do_ar", 87, 94),
+        Field("codigo_da_baixa", 95, 96),
+        Field("lote_do_objeto", 97, 104),
+        Field("nome_do_recebedor", 105, 144),
+        Field("rj_do_recebedor", 145, 156),
+        Field("motivo_devolucao", 157, 158),
+        Field("filler", 159, 159),
+        Field("numero_sequencial_arquivo", 160, 164, numeric=True),
+        Field("numero_sequencial_registro", 165, 170, numeric=True)
+    ], 170)
+    "Layout do registro Detalhe (1) do arquivo de retorno"
+
+    RETURN_TRAILER = RecordLayout([
+        Field("tipo_de_registro", 1, 1, numeric=True),
+        Field("codigo_do_cliente", 2, 5, numeric=True),
+        Field("filler", 6, 20),
+        Field("nome_do_cliente", 21, 60),
+        Field("quantidade_de_registros", 61, 66, numeric=True),
+        Field("filler2", 67, 159),
+        Field("numero_sequencial_arquivo", 160, 164, numeric=True),
+        Field("numero_sequencial_registro", 165, 170, numeric=True)
+    ], 170)
+    "Layout do registro Trailer (2) do arquivo de retorno"
+
+    def __init__(self, data=None, correlation_id=None):
+        self._shipping = None
+        self._type = 1101
+        self._data = []
 
-    def set_text(self, replace, _from, _until, fill=" "):
-        length = _until - (_from - 1)
-        text = str(replace).upper()
+        self.date = datetime.now()
 
-        if fill == 0:
-            text = text[:length].rjust(length, str(fill))
-        else:
-            text = text[:length].ljust(length, str(fill))
+        self.table = table
 
-        self.txt270 = self.txt270[:_from - 1] + text + self.txt270[_from - 1 + length:]
+        self.info = None
 
-    def _get_text(self, line, _from, length=None, is_number=False):
-        start = _from - 1
-        if length is None:
-            length = _from
+        self.correlation_id = correlation_id
+        "Identificador do envio que originou o arquivo (registrado nos spans da geração)"
 
-        text = line[start:start + length].strip()
+        if data is not None:
+            if not isinstance(data, ARData):
+                data = ARData.from_dict(data)
+
+            self.client_acronym = data.client_acronym
+            self.info = data.object_data
+
+            self._shipping = self.info.shipping
+
+            self.set_data([data.recipient_data])
+
+    @classmethod
+    def from_batch(cls, data, shipping=None, correlation_id=None):
+        """
+        Monta uma remessa com vários destinatários, gerando um único arquivo SD1 com um detalhe por AR.
+
+        Args:
+            data (list): Itens no formato de ResponseData.get_data() ou get_records(), um por AR.
+            shipping (int, optional): Número do lote/remessa (padrão é o lote do primeiro item).
+            correlation_id (str, optional): Identificador do envio que originou a remessa.
+
+        Returns:
+            TextAR: A remessa pronta para ser gerada.
+        """
+        if not data:
+            raise ValueError("A remessa deve conter ao menos um destinatário.")
+
+        data = [item if isinstance(item, ARData) else ARData.from_dict(item) for item in data]
+        first = data[0]
+
+        text_ar = cls(correlation_id=correlation_id)
+        text_ar.client_acronym = first.client_acronym
+        text_ar.info = first.object_data
+
+        if shipping is not None:
+            text_ar.info = text_ar.info._replace(shipping=shipping)
+
+        text_ar._shipping = text_ar.info.shipping
+
+        for item in data:
+            if item.object_data.client_code != text_ar.info.client_code:
+                raise ValueError("Todos os ARs da remessa devem pertencer ao mesmo cliente.")
+
+            text_ar._data.append(text_ar._normalize_detail(item.recipient_data, item.object_data))
+
+        return text_ar
+
+    def _header_line(self, registration_amount):
+        return self.HEADER.format({
+            "codigo_do_cliente": self.info.client_code,
+            "nome_do_cliente": self.info.client_name,
+            "data_de_geracao": self.date.strftime("%Y%m%d"),
+            "quantidade_de_registros": registration_amount,
+            "numero_sequencial_arquivo": self._shipping,
+            "numero_sequencial_registro": 1
+        })
+
+    def _detail_line(self, detail, sequential):
+        # Em remessas em lote, cada detalhe carrega os dados do seu próprio objeto
+        info = detail.object_data or self.info
+
+        return self.DETAIL.format({
+            "codigo_do_cliente": self.info.client_code,
+            "identificador_do_cliente": info.client_identifier,
+            "sigla_do_objeto": info.object_acronym,
+            "numero_do_objeto": info.object_number,
+            "codigo_da_operacao": self._type,
+            "conteudo": info.free_content,
+            "nome_destinatario": detail.name,
+            "endereco_destinatario": detail.address,
+            "cidade_destinatario": detail.city,
+            "uf_destinatario": detail.state,
+            "cep_destinatario": re.sub(r'[^0-9]', '', detail.zip_code),
+            "numero_sequencial_arquivo": self._shipping,
+            "numero_sequencial_registro": sequential
+        })
+
+    def _iter_details(self, details=None):
+        "Percorre os detalhes já normalizados ou normaliza sob demanda os detalhes informados."
+        if details is None:
+            yield from self._data
+        else:
+            for detail in details:
+                yield self._normalize_detail(detail)
 
-        try:
-            return int(text) if is_number else text
-        except:
+    def _format_date(self, data_str):
+        if not data_str:
             return ''
 
-    def _format_date(self, data_str):
         data_obj = datetime.strptime(data_str, "%Y%m%d")
 
         return data_obj.strftime("%d/%m/%Y")
 
+    def _normalize_detail(self, detail, object_data=None):
+        "Converte os dados do destinatário (dict ou AddressData) em um SD1Detail sem acentos."
+        if not isinstance(detail, AddressData):
+            detail = AddressData.from_dict(detail)
+
+        detail = AddressData._make([unidecode(value) for value in detail])
+
+        address = "%s %s " % (detail.street, detail.number)
+
+        if detail.complement:
+            address += detail.complement
+
+        address += " %s %s" % (detail.neighborhood, detail.city)
+
+        return SD1Detail(detail.name, address, detail.city, detail.state, detail.zip_code, object_data)
+
     def set_data(self, data):
         for detail in data:
-            for key in detail:
-                detail[key] = unidecode(detail[key])
+            self._data.append(self._normalize_detail(detail))
+
+    def _parse_header(self, line):
+        values = self.RETURN_HEADER.parse_values(line)
+        values[_movement_date] = self._format_date(values[_movement_date])
+        values[_generation_date] = self._format_date(values[_generation_date])
+
+        return ReturnHeader._make(values)
+
+    def _parse_detail(self, line):
+        values = self.RETURN_DETAIL.parse_values(line)
+        values[_delivery_date] = self._format_date(values[_delivery_date])
+        values.append(discharge_reasons.lookup(values[_discharge_code]))
+        values.append(return_reasons.lookup(values[_return_reason]))
+
+        return ReturnDetail._make(values)
+
+    def _parse_trailer(self, line):
+        return ReturnTrailer._make(self.RETURN_TRAILER.parse_values(line))
+
+    def iter_records(self, file_path, records=False):
+        """
+        Percorre o arquivo de retorno mapeado em memória, gerando um registro por vez.
+
+        O tipo de registro é identificado pelo primeiro byte da linha e apenas os campos
+        daquele tipo são extraídos. Linhas de tipo desconhecido são ignoradas.
+
+        Args:
+            file_path (str): Caminho do arquivo de retorno.
+            records (bool, optional): Gera ReturnHeader/ReturnDetail/ReturnTrailer em vez de dicionários.
+
+        Yields:
+            tuple: ("header" | "detail" | "trailer", dict (ou registro) com os campos do registro).
+        """
+        parsers = {
+            ord("0"): ("header", self._parse_header),
+            ord("1"): ("detail", self._parse_detail),
+            ord("2"): ("trailer", self._parse_trailer)
+        }
+
+        with open(file_path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                line_number = 0
+
+                for line in iter(buffer.readline, b""):
+                    line_number += 1
+
+                    parser = parsers.get(line[0])
+
+                    if parser is None:
+                        continue
+
+                    record_type, parse = parser
 
-            detail["address"] = "%s %s " % (detail["street"], detail["number"])
+                    try:
+                        record = parse(line.decode("utf-8"))
+                    except ValueError as e:
+                        raise ValueError(f"Registro inválido na linha {line_number} de '{file_path}': {e}") from e
 
-            if detail["complement"]:
-                detail["address"] += detail["complement"]
+                    yield record_type, record if records else record.to_dict()
 
-            detail["address"] += " %s %s" % (detail["neighborhood"], detail["city"])
+    def _decode_dates(self, values):
+        "Converte datas AAAAMMDD (int64) em numpy.datetime64[D], com NaT para valores inválidos."
+        import numpy as np
 
-            self._data.append(detail)
+        years = values // 10000
+        months = values // 100 % 100
+        days = values % 100
+        valid = (values >= 0) & (months >= 1) & (months <= 12) & (days >= 1) & (days <= 31)
+
+        months = np.where(valid, months, 1)
+        days = np.where(valid, days, 1)
+
+        dates = (np.where(valid, years, 1970) - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+        dates = (dates + (months - 1).astype("timedelta64[M]")).astype("datetime64[D]")
+        dates = dates + (days - 1).astype("timedelta64[D]")
+
+        return np.where(valid, dates, np.datetime64("NaT"))
+
+    def get_columns(self, file_path, columns=None):
+        """
+        Decodifica em lote os registros de detalhe do arquivo de retorno em arrays NumPy por coluna.
+
+        O arquivo é mapeado em memória como uma matriz de bytes (um registro por linha), os
+        detalhes são selecionados pelo tipo de registro e cada coluna é convertida de uma vez.
+        Exige registros de tamanho fixo.
+
+        Args:
+            file_path (str): Caminho do arquivo de retorno.
+            columns (list, optional): Campos desejados (padrão são todos os campos do detalhe e as
+                descrições "codigo_da_baixa_descricao" e "motivo_devolucao_descricao").
+
+        Returns:
+            dict: Nome do campo -> array. Datas viram datetime64[D] e números, int64 (-1 quando vazios).
+        """
+        import numpy as np
+
+        # Descrições: consultadas em lote a partir da coluna do código correspondente
+        descriptions = {
+            "codigo_da_baixa_descricao": ("codigo_da_baixa", discharge_reasons),
+            "motivo_devolucao_descricao": ("motivo_devolucao", return_reasons)
+        }
+
+        if columns is None:
+            columns = [field.name for field in self.RETURN_DETAIL.fields] + list(descriptions)
+
+        fields = [name for name in columns if name not in descriptions]
+        fields += [descriptions[name][0] for name in columns if name in descriptions and descriptions[name][0] not in fields]
+
+        with open(file_path, "rb") as file:
+            line = file.readline()
+
+        # Quebra de linha (LF ou CRLF) deduzida da primeira linha; LF quando o arquivo tem uma única linha
+        record = line.rstrip(b"\r\n")
+        newline = line[len(record):] or b"\n"
+        stride = len(record) + len(newline)
+        last = None
+
+        if not record:
+            records = np.empty((0, self.RETURN_DETAIL.length + 1), dtype=np.uint8)
+        else:
+            raw = np.memmap(file_path, dtype=np.uint8, mode="r")
+
+            # Linhas vazias ao final do arquivo são ignoradas, como em iter_records
+            size = raw.size
+
+            while size and raw[size - 1] in (ord("\n"), ord("\r")):
+                size -= 1
+
+            if bytes(raw[size:size + len(newline)]) == newline:
+                size += len(newline)
+
+            complete = size - size % stride
+
+            # Última linha sem quebra de linha: copiada à parte, sem trazer o arquivo inteiro para a memória
+            if size % stride == len(record) and raw[size - 1] != ord("\n"):
+                last = np.empty((1, stride), dtype=np.uint8)
+                last[0, :len(record)] = raw[complete:size]
+                last[0, len(record):] = np.frombuffer(newline, dtype=np.uint8)
+            elif size % stride:
+                raise ValueError(f"O arquivo '{file_path}' possui registros de tamanho variável.")
+
+            records = raw[:complete].reshape(-1, stride)
+
+            if not (records[:, -1] == ord("\n")).all():
+                raise ValueError(f"O arquivo '{file_path}' possui registros de tamanho variável.")
+
+        detail = records[records[:, 0] == ord("1")]
+
+        if last is not None and last[0, 0] == ord("1"):
+            detail = np.concatenate((detail, last))
+        data = self.RETURN_DETAIL.decode_columns(detail, fields)
+
+        if "data_da_entrega_do_ar" in data:
+            field = self.RETURN_DETAIL.field("data_da_entrega_do_ar")
+            data["data_da_entrega_do_ar"] = self._decode_dates(decode_numbers(detail[:, field.start - 1:field.end]))
+
+        for name in columns:
+            if name in descriptions:
+                code, index = descriptions[name]
+                data[name] = index.lookup_many(data[code])
+
+        return {name: data[name] for name in columns}
+
+    def get_data(self, file_path, columnar=False, columns=None, records=False):
+        """
+        Lê o arquivo de retorno.
+
+        Args:
+            file_path (str): Caminho do arquivo de retorno.
+            columnar (bool, optional): Retorna os detalhes em colunas NumPy (ver get_columns).
+            columns (list, optional): Campos desejados no modo colunar.
+            records (bool, optional): Retorna ReturnHeader/ReturnDetail/ReturnTrailer (tuplas imutáveis,
+                bem mais leves) em vez de dicionários; o header e o trailer ausentes ficam None.
+
+        Returns:
+            dict: {"header", "detail", "trailer"} ou None se o arquivo não existir.
+        """
+        if columnar:
+            return self.get_columns(file_path, columns)
+
+        data = {
+            "header": None if records else {},
+            "detail": [],
+            "trailer": None if records else {}
+        }
 
-    def get_data(self, file_path):
         try:
-            data = {
-                "header": {},
-                "detail": [],
-                "trailer": {}
-            }
-
-            with open(file_path, "r", encoding="utf-8") as file:
-                for line in file:
-                    tipo_de_registro = self._get_text(line, 1, 1, True)
-                    codigo_do_cliente = self._get_text(line, 2, 4, True)
-                    numero_sequencial_arquivo = self._get_text(line, 160, 5, True)
-                    numero_sequencial_registro = self._get_text(line, 165, 6, True)
-                    nome_do_cliente = self._get_text(line, 21, 40)
-                    filler = self._get_text(line, 6, 15)
-
-                    # Header
-                    if tipo_de_registro == 0:
-                        data["header"] = {
-                            "tipo_de_registro": tipo_de_registro,
-                            "codigo_do_cliente": codigo_do_cliente,
-                            "filler": filler,
-                            "nome_do_cliente": nome_do_cliente,
-                            "data_do_movimento": self._format_date(self._get_text(line, 61, 8)),
-                            "data_da_geracao": self._format_date(self._get_text(line, 69, 8)),
-                            "filler2": self._get_text(line, 77, 83),
-                            "numero_sequencial_arquivo": numero_sequencial_arquivo,
-                            "numero_sequencial_registro": numero_sequencial_registro,
-                        }
-                    # Detail
-                    elif tipo_de_registro == 1:
-                        codigo_da_baixa = self._get_text(line, 95, 2)
-                        motivo_devolucao = self._get_text(line, 157, 2)
-
-                        data["detail"].append({
-                            "tipo_de_registro": tipo_de_registro,
-                            "codigo_do_cliente": codigo_do_cliente,
-                            "identificacao_do_cliente": self._get_text(line, 6, 8),
-                            "sigla_do_objeto": self._get_text(line, 14, 2),
-                            "numero_do_objeto": self._get_text(line, 16, 9, True),
-                            "pais_de_origem": self._get_text(line, 25, 2),
-                            "conteudo": self._get_text(line, 27, 60),
-                            "data_da_entrega_do_ar": self._format_date(self._get_text(line, 87, 8)),
-                            "codigo_da_baixa": codigo_da_baixa,
-                            "codigo_da_baixa_descricao": self.table.lookup_reason(codigo_da_baixa),
-                            "lote_do_objeto": self._get_text(line, 97, 8),
-                            "nome_do_recebedor": self._get_text(line, 105, 40),
-                            "rj_do_recebedor": self._get_text(line, 145, 12),
-                            "motivo_devolucao": motivo_devolucao,
-                            "motivo_devolucao_descricao": self.table.lookup_reason(motivo_devolucao),
-                            "filler": self._get_text(line, 159, 1),
-                            "numero_sequencial_arquivo": numero_sequencial_arquivo,
-                            "numero_sequencial_registro": numero_sequencial_registro
-                        })
-                    # Trailer
-                    elif tipo_de_registro == 2:
-                        data["trailer"] = {
-                            "tipo_de_registro": tipo_de_registro,
-                            "codigo_do_cliente": codigo_do_cliente,
-                            "filler": filler,
-                            "nome_do_cliente": nome_do_cliente,
-                            "quantidade_de_registros": self._get_text(line, 61, 6, True),
-                            "filler2": self._get_text(line, 67, 93),
-                            "numero_sequencial_arquivo": numero_sequencial_arquivo,
-                            "numero_sequencial_registro": numero_sequencial_registro
-                        }
-
-                return data
+            for record_type, record in self.iter_records(file_path, records):
+                if record_type == "detail":
+                    data["detail"].append(record)
+                else:
+                    data[record_type] = record
+
+            return data
         except FileNotFoundError:
             print(f"O arquivo '{file_path}' não foi encontrado.")
 
-        except Exception as e:
-            print(f"Ocorreu um erro: {e}")
-
     def set_filename(self):
         date = self.date.strftime("%d%m")
         client_acronym = self.client_acronym
-        sequential = self.info.get("shipping")
+        sequential = self.info.shipping
 
         return f"{client_acronym}1{date}{sequential}.SD1"
 
-    def generate(self, type = "include"):
+    def _set_type(self, type):
         self._type = 1101 if type == "include" else 1102
-        self._registration_amount = len(self._data) + 1
 
-        self._set_header()
+    def iter_lines(self, type="include", details=None):
+        """
+        Gera as linhas do arquivo SD1 (header seguido dos detalhes) à medida que são formatadas.
+
+        A quantidade de registros do header é calculada antecipadamente, por isso 'details'
+        (quando informado) deve ser uma sequência com tamanho conhecido.
+        """
+        self._set_type(type)
+
+        registration_amount = len(self._data if details is None else details) + 1
+
+        yield self._header_line(registration_amount)
+
+        for sequential, detail in enumerate(self._iter_details(details), 2):
+            yield self._detail_line(detail, sequential)
+
+    def write(self, file, type="include", details=None):
+        """
+        Grava o arquivo SD1 de forma incremental em um objeto de arquivo.
 
-        for detail in self._data:
-            self._set_detail(detail)
+        'details' pode ser qualquer iterável de dados de destinatário. Quando o tamanho não é
+        conhecido antecipadamente, o header é gravado com quantidade zero e corrigido ao final,
+        o que exige um arquivo com suporte a seek.
 
-        file_path = f"ftp_files/{self.set_filename()}"
+        Returns:
+            int: A quantidade de registros gravados (inclui o header).
+        """
+        self._set_type(type)
 
         try:
-            with open(file_path, "w", encoding="ANSI") as file:
-                file.write(self._txt)
+            registration_amount = len(self._data if details is None else details) + 1
+        except TypeError:
+            registration_amount = None
+
+            if not file.seekable():
+                raise ValueError("A quantidade de registros é desconhecida e o arquivo não permite seek.")
+
+        start = file.tell() if registration_amount is None else None
+
+        file.write(self._header_line(registration_amount or 0))
+
+        sequential = 1
+
+        for detail in self._iter_details(details):
+            sequential += 1
+
+            file.write("\n")
+            file.write(self._detail_line(detail, sequential))
+
+        # Corrige a quantidade de registros do header após o streaming dos detalhes
+        if registration_amount is None:
+            end = file.tell()
+
+            file.seek(start)
+            file.write(self._header_line(sequential))
+            file.seek(end)
+
+        return sequential
+
+    def generate(self, type = "include", details=None, directory="ftp_files"):
+        file_path = f"{directory}/{self.set_filename()}"
+
+        with span("generate", self.correlation_id, file=file_path) as record:
+            try:
+                with timed("generation"), open(file_path, "w", encoding=_file_encoding, buffering=_write_buffer_size) as file:
+                    record["records"] = self.write(file, type, details)
+
+                return file_path
+            except Exception as e:
+                print(f"Erro ao salvar o arquivo: {e}")
 
-            return file_path
-        except Exception as e:
-            print(f"Erro ao salvar o arquivo: {e}")
+                record["status"] = "error"
+                record["error"] = e.__str__()
 
-            return False
+                return False
@@ -0,0 +1,106 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+
+from generate import TextAR
+
+
+def _parse_file(file_path):
+    "Processa um arquivo de retorno (executado em um processo do pool)."
+    start = time.perf_counter()
+
+    try:
+        data = TextAR().get_data(file_path)
+        error = None if data is not None else "Arquivo não encontrado."
+    except Exception as e:
+        data = None
+        error = e.__str__()
+
+    return file_path, data, error, time.perf_counter() - start
+
+def list_return_files(pattern="ftp_files"):
+    "Lista os arquivos de retorno de um diretório ou padrão glob, ignorando as remessas (.SD1)."
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*")
+
+    files = [file for file in glob(pattern) if os.path.isfile(file)]
+
+    return sorted(file for file in files if not file.upper().endswith(".SD1"))
+
+def ingest_return_files(pattern="ftp_files", workers=None):
+    """
+    Processa em paralelo todos os arquivos de retorno de um diretório ou padrão glob.
+
+    Cada arquivo é processado por TextAR.get_data em um processo do pool e os resultados são
+    reunidos ao final. A quantidade de registros informada no trailer de cada arquivo é
+    conferida com a quantidade de detalhes lidos.
+
+    Args:
+        pattern (str, optional): Diretório ou padrão glob dos arquivos (padrão é "ftp_files").
+        workers (int, optional): Quantidade de processos (padrão é a quantidade de CPUs).
+
+    Returns:
+        dict: Headers, detalhes e trailers de todos os arquivos, além do relatório por arquivo
+        em "files" (detalhes lidos, quantidade esperada, validade, erro e tempo em segundos).
+    """
+    files = list_return_files(pattern)
+
+    data = {
+        "header": [],
+        "detail": [],
+        "trailer": [],
+        "files": []
+    }
+
+    if not files:
+        return data
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_parse_file, files)
+
+        for file_path, file_data, error, elapsed in results:
+            report = {
+                "file": file_path,
+                "details": 0,
+                "expected": None,
+                "valid": False,
+                "error": error,
+                "elapsed": elapsed
+            }
+
+            if file_data is not None:
+                trailer = file_data["trailer"]
+
+                report["details"] = len(file_data["detail"])
+                report["expected"] = trailer.get("quantidade_de_registros")
+                report["valid"] = report["details"] == report["expected"]
+
+                if not report["valid"] and error is None:
+                    report["error"] = "A quantidade de registros do trailer não confere com os detalhes lidos."
+
+                data["header"].append(file_data["header"])
+                data["detail"].extend(file_data["detail"])
+                data["trailer"].append(trailer)
+
+            data["files"].append(report)
+
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Processa em paralelo os arquivos de retorno de AR.")
+    parser.add_argument("pattern", nargs="?", default="ftp_files", help="Diretório ou padrão glob dos arquivos.")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Quantidade de processos.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = ingest_return_files(args.pattern, args.workers)
+
+    for report in result["files"]:
+        status = "OK" if report["valid"] else f"ERRO: {report['error']}"
+
+        print(f"{report['file']}: {report['details']} detalhes em {report['elapsed']:.3f}s - {status}")
+
+    print(f"{len(result['files'])} arquivos, {len(result['detail'])} detalhes em {time.perf_counter() - start:.3f}s")
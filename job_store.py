@@ -0,0 +1,212 @@
+import json
+import os
+import sqlite3
+import time
+from threading import Lock
+
+if "FLASK_APP" not in os.environ:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+class JobStore():
+    """
+    Registro persistente (SQLite) das etapas de cada envio de AR.
+
+    Um envio é registrado logo após a inclusão no e-Cidade, com a resposta bruta do e-Cidade
+    (os dados mapeados são gravados em seguida), e avança pelas etapas
+    'included' -> 'generated' -> 'uploaded'. Envios que não chegaram a 'uploaded' podem ser
+    retomados (por exemplo, após reiniciar o processo) sem chamar o e-Cidade novamente.
+
+    Os envios agrupados em remessas (kind "remittance") registram a remessa em que foram
+    descarregados; cada remessa recebe um número de remessa próprio e crescente por cliente.
+
+    Após 'max_attempts' tentativas sem sucesso o envio passa para a etapa 'failed' e deixa de
+    ser retomado automaticamente (ainda pode ser reenviado manualmente).
+    """
+    INCLUDED = "included"
+    GENERATED = "generated"
+    UPLOADED = "uploaded"
+    FAILED = "failed"
+
+    def __init__(self, path=None, max_attempts=None):
+        self.path = path or os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+        self.max_attempts = max_attempts or int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+        self._lock = Lock()
+
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                client_id TEXT,
+                kind TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                response_data TEXT NOT NULL,
+                shipping INTEGER,
+                file_path TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                remittance_id INTEGER,
+                ecidade_response TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_stage ON jobs (stage)")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS remittances (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                client_acronym TEXT NOT NULL,
+                shipping INTEGER,
+                number INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                UNIQUE (client_acronym, number)
+            )
+        """)
+
+        # Bancos criados por versões anteriores não têm as colunas acrescentadas depois
+        columns = [row["name"] for row in self._connection.execute("PRAGMA table_info(jobs)")]
+
+        for column, definition in (("remittance_id", "INTEGER"), ("ecidade_response", "TEXT")):
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+
+    def _to_dict(self, row):
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["response_data"] = json.loads(job["response_data"])
+        job["ecidade_response"] = json.loads(job["ecidade_response"]) if job["ecidade_response"] is not None else None
+
+        return job
+
+    def create(self, client_id, response_data, kind="single", shipping=None, ecidade_response=None):
+        """
+        Registra um envio já incluído no e-Cidade.
+
+        Args:
+            client_id (str): Sessão do Socket.IO que originou o envio.
+            response_data (dict or list): Saída de ResponseData.get_data() (uma lista no envio em lote),
+                ou None enquanto a resposta do e-Cidade ainda não foi mapeada.
+            kind (str, optional): "single", "batch" ou "remittance" (envio individual agrupado em remessa).
+            shipping (int, optional): Número do lote/remessa informado no envio em lote.
+            ecidade_response (dict or list, optional): Resposta bruta da inclusão (uma lista no envio em lote).
+
+        Returns:
+            int: O identificador do envio.
+        """
+        now = time.time()
+
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO jobs (client_id, kind, stage, response_data, shipping, ecidade_response, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    client_id, kind, self.INCLUDED, json.dumps(response_data), shipping,
+                    json.dumps(ecidade_response) if ecidade_response is not None else None, now, now
+                )
+            )
+
+            return cursor.lastrowid
+
+    def create_remittance(self, client_acronym, shipping, job_ids):
+        """
+        Registra uma remessa agrupada e associa a ela os envios informados.
+
+        O número da remessa (nome do arquivo SD1 e sequencial de arquivo do header) é o seguinte
+        ao da última remessa do cliente, e nunca menor que o lote dos ARs agrupados: a primeira
+        remessa de um cliente mantém o número do lote.
+
+        Args:
+            client_acronym (str): Sigla do cliente.
+            shipping (int): Lote dos ARs agrupados.
+            job_ids (list): Envios descarregados na remessa.
+
+        Returns:
+            int: O número da remessa.
+        """
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+
+            try:
+                cursor = self._connection.execute(
+                    """
+                    INSERT INTO remittances (client_acronym, shipping, number, created_at)
+                    SELECT ?, ?, MAX(COALESCE(MAX(number), 0) + 1, COALESCE(?, 1)), ? FROM remittances
+                    WHERE client_acronym = ?
+                    """,
+                    (client_acronym, shipping, shipping, now, client_acronym)
+                )
+                remittance_id = cursor.lastrowid
+
+                self._connection.executemany(
+                    "UPDATE jobs SET remittance_id = ?, updated_at = ? WHERE id = ?",
+                    [(remittance_id, now, job_id) for job_id in job_ids if job_id is not None]
+                )
+
+                number = self._connection.execute("SELECT number FROM remittances WHERE id = ?", (remittance_id,)).fetchone()[0]
+
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+            return number
+
+    def update(self, job_id, stage=None, file_path=None, error=None, attempt=False, response_data=None):
+        """
+        Avança a etapa do envio e/ou registra o arquivo gerado, os dados mapeados e o último erro.
+
+        Uma tentativa sem nova etapa (falha) que atinge 'max_attempts' marca o envio como 'failed'.
+        """
+        if job_id is None:
+            return
+
+        assignments = ["updated_at = ?", "error = ?"]
+        values = [time.time(), error]
+
+        if stage is not None:
+            assignments.append("stage = ?")
+            values.append(stage)
+
+        if file_path is not None:
+            assignments.append("file_path = ?")
+            values.append(file_path)
+
+        if response_data is not None:
+            assignments.append("response_data = ?")
+            values.append(json.dumps(response_data))
+
+        if attempt:
+            assignments.append("attempts = attempts + 1")
+
+            if stage is None:
+                assignments.append("stage = CASE WHEN attempts + 1 >= ? THEN ? ELSE stage END")
+                values.extend((self.max_attempts, self.FAILED))
+
+        with self._lock:
+            self._connection.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ?", (*values, job_id))
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+        return self._to_dict(row)
+
+    def pending(self):
+        "Retorna os envios que ainda não foram enviados por FTP nem falharam, do mais antigo ao mais recente."
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM jobs WHERE stage NOT IN (?, ?) ORDER BY id", (self.UPLOADED, self.FAILED)
+            ).fetchall()
+
+        return [self._to_dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,170 @@
+class Field():
+    "Campo de um registro de largura fixa (posições inclusivas, a partir de 1)."
+    __slots__ = ("name", "start", "end", "numeric", "fill", "value")
+
+    def __init__(self, name, start, end, numeric=False, fill=None, value=None):
+        if start < 1 or end < start:
+            raise ValueError(f"Intervalo inválido para o campo '{name}': {start}-{end}.")
+
+        self.name = name
+        self.start = start
+        self.end = end
+
+        # Campos numéricos são alinhados à direita e preenchidos com zeros,
+        # alfanuméricos são alinhados à esquerda e preenchidos com espaços
+        self.numeric = numeric
+        self.fill = str(fill) if fill is not None else ("0" if numeric else " ")
+
+        # Valor fixo (tipo de registro, fillers etc.), gravado direto no template
+        self.value = value
+
+    @property
+    def length(self):
+        return self.end - (self.start - 1)
+
+    def pad(self, value):
+        "Trunca e preenche o valor até o tamanho do campo."
+        text = str(value).upper()[:self.length]
+
+        if self.numeric:
+            return text.rjust(self.length, self.fill)
+
+        return text.ljust(self.length, self.fill)
+
+
+class RecordLayout():
+    "Layout declarativo de um tipo de registro, compilado uma única vez em um template de formatação."
+
+    def __init__(self, fields, length):
+        self.fields = tuple(sorted(fields, key=lambda field: field.start))
+        self.length = length
+
+        self._validate()
+        self._compile()
+
+    def _validate(self):
+        position = 1
+
+        for field in self.fields:
+            if field.start < position:
+                raise ValueError(f"O campo '{field.name}' sobrepõe o campo anterior na posição {field.start}.")
+
+            if field.end > self.length:
+                raise ValueError(f"O campo '{field.name}' ultrapassa o tamanho do registro ({self.length}).")
+
+            position = field.end + 1
+
+    def _compile(self):
+        parts = []
+        names = []
+        position = 1
+
+        for field in self.fields:
+            # Posições não mapeadas são preenchidas com espaços
+            if field.start > position:
+                parts.append(" " * (field.start - position))
+
+            if field.value is not None:
+                parts.append(field.pad(field.value).replace("{", "{{").replace("}", "}}"))
+            else:
+                align = ">" if field.numeric else "<"
+                parts.append("{%d:%s%s%d.%d}" % (len(names), field.fill, align, field.length, field.length))
+                names.append(field.name)
+
+            position = field.end + 1
+
+        if position <= self.length:
+            parts.append(" " * (self.length - position + 1))
+
+        self._template = "".join(parts)
+        self._names = tuple(names)
+        self._slices = tuple((field.name, field.start - 1, field.end, field.numeric) for field in self.fields)
+        self._names_in_order = tuple(field.name for field in self.fields)
+        self._fields = {field.name: field for field in self.fields}
+
+    def field(self, name):
+        "Retorna o campo pelo nome."
+        if name not in self._fields:
+            raise ValueError(f"O campo '{name}' não existe no layout.")
+
+        return self._fields[name]
+
+    def format(self, values):
+        "Monta o registro completo em uma única passada a partir de um mapeamento nome -> valor."
+        return self._template.format(*[str(values[name]).upper() for name in self._names])
+
+    def parse(self, line):
+        "Extrai os campos do registro a partir de uma linha, convertendo os campos numéricos para int."
+        return dict(zip(self._names_in_order, self.parse_values(line)))
+
+    def parse_values(self, line):
+        "Como parse, mas retorna apenas os valores (lista na ordem dos campos), sem montar um dicionário."
+        values = []
+
+        for _, start, end, numeric in self._slices:
+            text = line[start:end].strip()
+
+            if numeric:
+                try:
+                    text = int(text)
+                except ValueError:
+                    text = ''
+
+            values.append(text)
+
+        return values
+
+    def decode_columns(self, records, columns=None):
+        """
+        Decodifica em lote uma matriz de registros (numpy.uint8, um registro por linha) em colunas.
+
+        Campos numéricos viram arrays int64 (-1 quando vazios ou inválidos) e os demais viram
+        arrays de strings sem os espaços das extremidades.
+
+        Returns:
+            dict: Nome do campo -> array com os valores de todos os registros.
+        """
+        import numpy as np
+
+        data = {}
+
+        for name in columns or self._fields:
+            field = self.field(name)
+
+            if records.shape[1] < field.end:
+                raise ValueError(f"Os registros são menores que o campo '{name}' ({field.start}-{field.end}).")
+
+            block = records[:, field.start - 1:field.end]
+
+            if field.numeric:
+                data[name] = decode_numbers(block)
+            else:
+                text = np.ascontiguousarray(block).view(f"S{field.length}")[:, 0]
+                data[name] = np.char.decode(np.char.strip(text), "utf-8", "replace")
+
+        return data
+
+
+def decode_numbers(block):
+    """
+    Converte uma matriz de dígitos ASCII (numpy.uint8) em inteiros, equivalente a int(texto.strip()).
+
+    Linhas vazias ou com caracteres inválidos resultam em -1.
+    """
+    import numpy as np
+
+    digits = block.astype(np.int64) - ord("0")
+    is_digit = (digits >= 0) & (digits <= 9)
+    is_space = block == ord(" ")
+
+    # Expoente de cada dígito: quantidade de dígitos à sua direita
+    digits_after = np.cumsum(is_digit[:, ::-1], axis=1)[:, ::-1] - is_digit
+    values = (np.where(is_digit, digits, 0) * 10 ** np.where(is_digit, digits_after, 0)).sum(axis=1)
+
+    # Os dígitos devem ser contíguos, cercados apenas por espaços
+    count = is_digit.sum(axis=1)
+    first = is_digit.argmax(axis=1)
+    last = block.shape[1] - 1 - is_digit[:, ::-1].argmax(axis=1)
+    valid = (is_digit | is_space).all(axis=1) & (count > 0) & (last - first + 1 == count)
+
+    return np.where(valid, values, -1)
@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import socketio as socketio_client
+
+from benchmark import ecidade_response
+
+# Formulário válido enviado por todos os clientes simulados
+_form = {
+    "name": "Joaquim",
+    "surname": "Manoel da Silva",
+    "document": "84588236164",
+    "zipCode": "71937-720",
+    "street": "Avenida Central",
+    "number": "42",
+    "complement": "Apto 101",
+    "neighborhood": "Asa Sul",
+    "city": "Brasília",
+    "state": "DF"
+}
+
+# Mensagens do evento 'loader' que marcam o início de cada etapa do envio
+_stage_messages = {
+    "Incluindo AR...": "inclusion",
+    "Preparando...": "mapping",
+    "Gerando AR...": "generation",
+    "Enviando arquivo...": "upload"
+}
+
+_stages = ("queue", "inclusion", "mapping", "generation", "upload")
+
+# Etapa associada ao título de cada evento 'error'
+_error_stages = {
+    "Erro!": "inclusion",
+    "Erro AR": "generation",
+    "Erro na conexão com o servidor FTP": "upload"
+}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+
+        return sock.getsockname()[1]
+
+def start_ecidade(latency=0.0):
+    "Inicia um servidor local que simula o OAuth e a inclusão do e-Cidade."
+    counter = {"number": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            time.sleep(latency)
+
+            if self.path.endswith("/token"):
+                body = {"access_token": "load-test", "expires_in": 3600}
+            else:
+                with lock:
+                    counter["number"] += 1
+                    number = counter["number"]
+
+                body = ecidade_response(number)
+
+            content = json.dumps(body).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+def start_ftp(directory):
+    "Inicia um servidor FTP local (pyftpdlib) com o usuário 'ar'/'ar'."
+    import logging
+
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.log import config_logging
+    from pyftpdlib.servers import ThreadedFTPServer
+
+    config_logging(level=logging.WARNING)
+
+    authorizer = DummyAuthorizer()
+    authorizer.add_user("ar", "ar", directory, perm="elradfmwMT")
+
+    handler = type("LoadTestFTPHandler", (FTPHandler,), {"authorizer": authorizer})
+
+    server = ThreadedFTPServer(("127.0.0.1", 0), handler)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+def start_app(port, ecidade, ftp, directory):
+    """
+    Inicia o app.py em um subprocesso apontando para os servidores locais.
+
+    O subprocesso roda em 'directory', de modo que os arquivos SD1 gerados (ftp_files/) e o
+    banco de envios não se misturem aos do projeto.
+    """
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    os.makedirs(os.path.join(directory, "ftp_files"), exist_ok=True)
+
+    env = dict(os.environ)
+    env.update({
+        "FLASK_APP": "app.py",
+        "FLASK_RUN_HOST": "127.0.0.1",
+        "FLASK_RUN_PORT": str(port),
+        "ECIDADE_BASE": f"http://127.0.0.1:{ecidade.server_port}",
+        "OAUTH_TOKEN_URI": "/oauth/token",
+        "ECIDADE_INCLUSAO": "/inclusao",
+        "FTP_SERVER_HOST": "127.0.0.1",
+        "FTP_SERVER_PORT": str(ftp.address[1]),
+        "FTP_SERVER_USER": "ar",
+        "FTP_SERVER_PASS": "ar",
+        "FTP_SERVER_DIR": "/",
+        "JOB_STORE_PATH": os.path.join(directory, "jobs.sqlite3"),
+        "UPLOAD_PROGRESS_BAR": "false"
+    })
+
+    process = subprocess.Popen([sys.executable, app], cwd=directory, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 30
+
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+
+    process.kill()
+
+    raise RuntimeError("O app.py não iniciou a tempo.")
+
+def simulate_client(url, requests, timeout, results):
+    "Cliente Socket.IO simulado: envia 'requests' formulários em sequência e registra os tempos."
+    client = socketio_client.Client(reconnection=False)
+    state = {}
+    done = threading.Event()
+
+    @client.on("loader")
+    def on_loader(message, progress=None):
+        stage = _stage_messages.get(message)
+
+        if stage is not None:
+            state["marks"].setdefault(stage, time.perf_counter())
+
+    @client.on("success")
+    def on_success(data, message):
+        state["end"] = time.perf_counter()
+        done.set()
+
+    @client.on("error")
+    def on_error(title, message=None):
+        state["end"] = time.perf_counter()
+        state["error"] = _error_stages.get(title, "other")
+        done.set()
+
+    @client.on("invalid document")
+    def on_invalid(message=None):
+        state["end"] = time.perf_counter()
+        state["error"] = "validation"
+        done.set()
+
+    try:
+        client.connect(url, wait_timeout=timeout)
+    except Exception:
+        results.extend({"error": "connection", "stages": {}, "latency": None} for _ in range(requests))
+        return
+
+    # "websocket" ou "polling" (sem o pacote websocket-client o cliente fica no long-polling)
+    transport = client.transport()
+
+    for _ in range(requests):
+        state.clear()
+        state["marks"] = {}
+        done.clear()
+
+        start = time.perf_counter()
+        client.emit("send data", _form)
+
+        if not done.wait(timeout):
+            results.append({"error": "timeout", "stages": {}, "latency": None, "transport": transport})
+            continue
+
+        # Duração de cada etapa: do seu início até o início da etapa seguinte (ou o fim)
+        marks = [("queue", start)] + [(stage, state["marks"][stage]) for stage in _stages[1:] if stage in state["marks"]]
+        ends = [mark for _, mark in marks[1:]] + [state["end"]]
+
+        results.append({
+            "error": state.get("error"),
+            "stages": {stage: end - mark for (stage, mark), end in zip(marks, ends)},
+            "latency": state["end"] - start,
+            "transport": transport
+        })
+
+    client.disconnect()
+
+def percentiles(values):
+    if not values:
+        return None
+
+    values = sorted(values)
+
+    def percentile(p):
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] * 1000
+
+    return {"p50_ms": percentile(50), "p90_ms": percentile(90), "p99_ms": percentile(99), "max_ms": values[-1] * 1000}
+
+def run(url, clients, requests, timeout):
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        client_results = []
+        simulate_client(url, requests, timeout, client_results)
+
+        with lock:
+            results.extend(client_results)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+
+    start = time.perf_counter()
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - start
+    succeeded = [result for result in results if result["error"] is None]
+    errors = {}
+
+    for result in results:
+        if result["error"] is not None:
+            errors[result["error"]] = errors.get(result["error"], 0) + 1
+
+    return {
+        "clients": clients,
+        "transports": sorted({result["transport"] for result in results if result.get("transport")}),
+        "requests_per_client": requests,
+        "total": len(results),
+        "succeeded": len(succeeded),
+        "elapsed_s": elapsed,
+        "throughput": len(succeeded) / elapsed if elapsed else None,
+        "latency": percentiles([result["latency"] for result in succeeded]),
+        "stages": {stage: percentiles([result["stages"][stage] for result in succeeded if stage in result["stages"]]) for stage in _stages},
+        "error_rates": {stage: count / len(results) for stage, count in errors.items()}
+    }
+
+def print_report(report):
+    print(f"{report['succeeded']}/{report['total']} envios em {report['elapsed_s']:.2f}s "
+          f"({report['throughput'] or 0:.1f} envios/s) - {report['clients']} clientes "
+          f"({', '.join(report['transports']) or 'sem conexão'})")
+
+    for name, stats in [("ponta a ponta", report["latency"])] + list(report["stages"].items()):
+        if stats:
+            print(f"  {name:<15} p50 {stats['p50_ms']:>9.1f} ms  p90 {stats['p90_ms']:>9.1f} ms  p99 {stats['p99_ms']:>9.1f} ms")
+
+    for stage, rate in report["error_rates"].items():
+        print(f"  erros ({stage}): {rate:.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do fluxo 'send data' -> 'loader' -> 'success'.")
+    parser.add_argument("-c", "--clients", type=int, default=10, help="Clientes Socket.IO simultâneos.")
+    parser.add_argument("-n", "--requests", type=int, default=10, help="Envios por cliente.")
+    parser.add_argument("--url", default=None, help="URL de um app já em execução (padrão: inicia o app.py localmente).")
+    parser.add_argument("--ecidade-latency", type=float, default=0.05, help="Latência simulada do e-Cidade (segundos).")
+    parser.add_argument("--timeout", type=float, default=60, help="Tempo máximo de espera por envio (segundos).")
+    parser.add_argument("-o", "--output", default=None, help="Arquivo JSON de saída.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        process = None
+        ecidade = ftp = None
+        url = args.url
+
+        if url is None:
+            ecidade = start_ecidade(args.ecidade_latency)
+            remote = os.path.join(directory, "remote")
+            os.makedirs(remote)
+
+            ftp = start_ftp(remote)
+
+            port = free_port()
+            process = start_app(port, ecidade, ftp, directory)
+            url = f"http://127.0.0.1:{port}"
+
+        try:
+            report = run(url, args.clients, args.requests, args.timeout)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+            if ecidade is not None:
+                ecidade.shutdown()
+
+            if ftp is not None:
+                ftp.close_all()
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
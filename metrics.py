@@ -0,0 +1,159 @@
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+_default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+
+    if not pairs:
+        return ""
+
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter():
+    "Contador monotônico, opcionalmente separado por rótulos."
+
+    type = "counter"
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+
+        self._lock = Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram():
+    "Histograma de durações (em segundos) com buckets cumulativos, no formato do Prometheus."
+
+    type = "histogram"
+
+    def __init__(self, name, description, labelnames=(), buckets=_default_buckets):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+        self._lock = Lock()
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0)
+
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {cumulative}"
+
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry():
+    "Conjunto de métricas do processo, exportado em texto pela rota /metrics."
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        self._metrics.setdefault(metric.name, metric)
+
+        return self._metrics[metric.name]
+
+    def counter(self, name, description, labelnames=()):
+        return self._register(Counter(name, description, labelnames))
+
+    def histogram(self, name, description, labelnames=(), buckets=_default_buckets):
+        return self._register(Histogram(name, description, labelnames, buckets))
+
+    def render(self):
+        lines = []
+
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_duration = registry.histogram("ar_stage_duration_seconds", "Duração de cada etapa do envio de um AR.", ("stage",))
+
+stage_errors = registry.counter("ar_stage_errors_total", "Erros de cada etapa do envio de um AR, por tipo.", ("stage", "type"))
+
+def count_error(stage, type, amount=1):
+    "Contabiliza um erro de 'stage' que não chegou a levantar exceção (ex.: resposta de erro do e-Cidade)."
+    stage_errors.inc(amount, stage=stage, type=type)
+
+@contextmanager
+def timed(stage):
+    """
+    Mede a duração de uma etapa (validation, token, inclusion, mapping, generation,
+    ftp_connect, ftp_transfer...) e contabiliza as exceções pelo nome da classe.
+    """
+    start = time.perf_counter()
+
+    try:
+        yield
+    except BaseException as e:
+        count_error(stage, type(e).__name__)
+        raise
+    finally:
+        stage_duration.observe(time.perf_counter() - start, stage=stage)
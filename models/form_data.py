@@ -2,11 +2,13 @@ from utils.cpf_cnpj import validate_document
 
 
 class FormData():
-    def __init__(self, request_json):
+    def __init__(self, request_json, valid=None):
         _json = request_json
 
         self.cpfcnpj = _json.get('document')
-        self.valid = validate_document(self.cpfcnpj)
+
+        # Validação já feita em lote (validate_many) pelo envio de vários formulários
+        self.valid = validate_document(self.cpfcnpj) if valid is None else valid
         self.destinatario = f"{_json.get('name')} {_json.get('surname')}"
         self.numero = _json.get("number") if _json.get("number") != "" else 0
 
@@ -0,0 +1,107 @@
+from collections import namedtuple
+
+from utils.case_converter import CaseConverter
+
+
+def record_type(name, keys):
+    """
+    Cria um registro imutável (namedtuple, sem __dict__) para um dicionário de chaves fixas.
+
+    Os atributos usam as chaves em snake_case; from_dict/to_dict convertem de/para o formato
+    original (ex.: kebab-case de ResponseData.get_data) e to_camel_case para o payload do Socket.IO.
+
+    Args:
+        name (str): Nome da classe.
+        keys (tuple): Chaves do dicionário original, na ordem dos campos.
+
+    Returns:
+        type: A classe do registro.
+    """
+    fields = tuple(key.replace("-", "_") for key in keys)
+    camel_keys = tuple(CaseConverter.to_camel_case(key) for key in keys)
+
+    class Record(namedtuple(name, fields)):
+        __slots__ = ()
+
+        @classmethod
+        def from_dict(cls, data):
+            "Monta o registro a partir do dicionário original (chaves ausentes viram None)."
+            return cls._make([data.get(key) for key in keys])
+
+        def to_dict(self):
+            "Dicionário com as chaves originais."
+            return dict(zip(keys, self))
+
+        def to_camel_case(self):
+            "Dicionário com as chaves em camelCase (payload do Socket.IO)."
+            return dict(zip(camel_keys, self))
+
+    Record.__name__ = Record.__qualname__ = name
+    Record.source_keys = keys
+
+    return Record
+
+ObjectData = record_type("ObjectData", (
+    "client-code", "client-name", "client-identifier", "shipping", "object-acronym", "object-number", "free-content"
+))
+"Dados do objeto (ResponseData.get_data()['object-data'])"
+
+AddressData = record_type("AddressData", (
+    "name", "zip-code", "street", "number", "complement", "neighborhood", "city", "state"
+))
+"Dados do destinatário ou da devolução (ResponseData.get_data()['recipient-data'] e ['return-data'])"
+
+SD1Detail = record_type("SD1Detail", ("name", "address", "city", "state", "zip-code", "object-data"))
+"Detalhe normalizado de uma remessa SD1 (nomes sem acentos e endereço completo, ObjectData do AR nas remessas em lote), usado por TextAR"
+
+ReturnHeader = record_type("ReturnHeader", (
+    "tipo_de_registro", "codigo_do_cliente", "filler", "nome_do_cliente", "data_do_movimento",
+    "data_da_geracao", "filler2", "numero_sequencial_arquivo", "numero_sequencial_registro"
+))
+"Registro Header (0) do arquivo de retorno"
+
+ReturnDetail = record_type("ReturnDetail", (
+    "tipo_de_registro", "codigo_do_cliente", "identificacao_do_cliente", "sigla_do_objeto", "numero_do_objeto",
+    "pais_de_origem", "conteudo", "data_da_entrega_do_ar", "codigo_da_baixa", "lote_do_objeto",
+    "nome_do_recebedor", "rj_do_recebedor", "motivo_devolucao", "filler", "numero_sequencial_arquivo",
+    "numero_sequencial_registro", "codigo_da_baixa_descricao", "motivo_devolucao_descricao"
+))
+"Registro Detalhe (1) do arquivo de retorno, com as descrições dos códigos de baixa e devolução"
+
+ReturnTrailer = record_type("ReturnTrailer", (
+    "tipo_de_registro", "codigo_do_cliente", "filler", "nome_do_cliente", "quantidade_de_registros",
+    "filler2", "numero_sequencial_arquivo", "numero_sequencial_registro"
+))
+"Registro Trailer (2) do arquivo de retorno"
+
+class ARData(namedtuple("ARData", ("client_acronym", "return_data", "object_data", "recipient_data"))):
+    "Dados de um AR incluído no e-Cidade (ResponseData.get_records())."
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get("client-acronym"),
+            AddressData.from_dict(data.get("return-data")),
+            ObjectData.from_dict(data.get("object-data")),
+            AddressData.from_dict(data.get("recipient-data"))
+        )
+
+    def to_dict(self):
+        "Dicionário no formato de ResponseData.get_data()."
+        return {
+            "client-acronym": self.client_acronym,
+            "return-data": self.return_data.to_dict(),
+            "object-data": self.object_data.to_dict(),
+            "recipient-data": self.recipient_data.to_dict()
+        }
+
+    def to_camel_case(self):
+        "Dicionário em camelCase (payload do Socket.IO)."
+        return {
+            "clientAcronym": self.client_acronym,
+            "returnData": self.return_data.to_camel_case(),
+            "objectData": self.object_data.to_camel_case(),
+            "recipientData": self.recipient_data.to_camel_case()
+        }
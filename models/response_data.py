@@ -1,4 +1,6 @@
+from models.records import AddressData, ARData, ObjectData
 from utils.format_string_with_mask import format_string_with_mask
+from utils.object_code import verification_digit
 
 
 class ResponseData():
@@ -75,33 +77,15 @@ class ResponseData():
             "recipient-data": self._recipient_data()
         }
 
+    def get_records(self):
+        "Os mesmos dados de get_data em registros imutáveis (ARData), convertidos com to_dict/to_camel_case."
+        return ARData(
+            self.client_data.get("identificador"),
+            AddressData.from_dict(self._return_data()),
+            ObjectData.from_dict(self._object_data()),
+            AddressData.from_dict(self._recipient_data())
+        )
+
     def calculate_verification_digit(self, registration_number):
-        # Verifique o tamanho do número de registro
-        if not (1 <= len(registration_number) <= 8):
-            raise ValueError("O número de registro deve conter de 1 a 8 dígitos.")
-
-        # Peso associado a cada dígito
-        weights = [8, 6, 4, 2, 3, 5, 9, 7]
-
-        # Preencha com zeros à esquerda se o número de registro tiver menos de 8 dígitos
-        registration_number = registration_number.zfill(8)
-
-        # Inicialize a soma
-        total = 0
-
-        # Calcule a soma ponderada dos dígitos
-        for i in range(8):
-            digit = int(registration_number[i])
-            weight = weights[i]
-            total += digit * weight
-
-        # Calcule o resto da divisão por 11
-        remainder = total % 11
-
-        # Verifique as regras para o dígito verificador
-        if remainder == 0:
-            return 5
-        elif remainder == 1:
-            return 0
-        else:
-            return 11 - remainder
\ No newline at end of file
+        # Tabela de pesos e regras do DV em utils.object_code (também usada na geração em lote)
+        return verification_digit(registration_number)
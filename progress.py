@@ -0,0 +1,73 @@
+import os
+import time
+
+if "FLASK_APP" not in os.environ:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+class ProgressReporter():
+    """
+    Agrupa as atualizações de progresso antes de repassá-las a 'emit'.
+
+    Um novo percentual só é emitido quando avança pelo menos 'step' pontos e já passou
+    'interval' segundos desde a última emissão. O primeiro e o último (100%) percentuais são
+    sempre emitidos. A barra do tqdm no console é opcional (UPLOAD_PROGRESS_BAR).
+    """
+
+    def __init__(self, total, emit, step=None, interval=None, bar=None, description=None):
+        self.total = total
+        self.emit = emit
+        self.step = step if step is not None else int(os.getenv("UPLOAD_PROGRESS_STEP", 5))
+        self.interval = interval if interval is not None else float(os.getenv("UPLOAD_PROGRESS_INTERVAL", 0.25))
+        self.done = 0
+        self.emitted = 0
+        "Quantidade de atualizações efetivamente emitidas"
+
+        self._last_progress = None
+        self._last_time = 0
+        self._bar = None
+
+        if bar is None:
+            bar = os.getenv("UPLOAD_PROGRESS_BAR", "true").lower() == "true"
+
+        if bar:
+            from tqdm import tqdm
+
+            self._bar = tqdm(total=total, unit="B", unit_scale=True, desc=description, leave=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _emit(self, progress, now):
+        self._last_progress = progress
+        self._last_time = now
+        self.emitted += 1
+
+        self.emit(progress)
+
+    def update(self, size):
+        self.done += size
+
+        if self._bar is not None:
+            self._bar.update(size)
+
+        progress = min(int((self.done / self.total) * 100), 100) if self.total else 100
+
+        if progress == self._last_progress:
+            return
+
+        now = time.monotonic()
+
+        if (self._last_progress is None or progress == 100
+                or (progress - self._last_progress >= self.step and now - self._last_time >= self.interval)):
+            self._emit(progress, now)
+
+    def close(self):
+        if self._bar is not None:
+            self._bar.close()
+            self._bar = None
@@ -0,0 +1,72 @@
+import os
+from threading import Lock, Timer
+
+
+class RemittanceBuffer():
+    """
+    Acumula os ARs incluídos por chave (sigla do cliente, lote) e os descarrega juntos.
+
+    Cada chave é descarregada quando atinge 'max_size' itens ou quando se passam 'interval'
+    segundos desde o primeiro item acumulado, o que ocorrer primeiro. O descarregamento chama
+    'flush(key, entries)' com os itens na ordem em que foram adicionados.
+    """
+
+    def __init__(self, flush, max_size=None, interval=None):
+        self._flush = flush
+        self.max_size = max_size or int(os.getenv("REMITTANCE_BATCH_SIZE", 100))
+        self.interval = interval or float(os.getenv("REMITTANCE_BATCH_INTERVAL", 60))
+
+        self._lock = Lock()
+        self._entries = {}
+        self._timers = {}
+
+    def _take(self, key):
+        timer = self._timers.pop(key, None)
+
+        if timer is not None:
+            timer.cancel()
+
+        return self._entries.pop(key, [])
+
+    def add(self, key, entry):
+        "Acumula um item; descarrega a chave imediatamente se ela atingir o tamanho máximo."
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            entries.append(entry)
+
+            if len(entries) >= self.max_size:
+                ready = self._take(key)
+            else:
+                ready = None
+
+                if key not in self._timers:
+                    timer = Timer(self.interval, self.flush, args=(key,))
+                    timer.daemon = True
+                    timer.start()
+
+                    self._timers[key] = timer
+
+        if ready:
+            self._flush(key, ready)
+
+    def flush(self, key):
+        "Descarrega os itens acumulados de uma chave."
+        with self._lock:
+            ready = self._take(key)
+
+        if ready:
+            self._flush(key, ready)
+
+    def flush_all(self):
+        with self._lock:
+            keys = list(self._entries)
+
+        for key in keys:
+            self.flush(key)
+
+    def size(self, key=None):
+        with self._lock:
+            if key is not None:
+                return len(self._entries.get(key, ()))
+
+            return sum(len(entries) for entries in self._entries.values())
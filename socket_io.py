@@ -1,162 +1,501 @@
+import atexit
 import os
-from ftplib import FTP
-from threading import Lock, Thread
+from threading import Lock
 
 from flask import request
 from flask_socketio import SocketIO
-from tqdm import tqdm
 
+from ftp_pool import FTPPool
 from generate import TextAR
+from job_store import JobStore
+from metrics import count_error, timed
 from models.form_data import FormData
+from models.records import ARData
 from models.response_data import ResponseData
-from token_ecidade import include
-from utils.case_converter import CaseConverter
+from progress import ProgressReporter
+from remittance_buffer import RemittanceBuffer
+from token_ecidade import include, include_many
+from tracing import new_correlation_id, span
+from upload_scheduler import UploadScheduler
+from utils.cpf_cnpj import validate_many
 from views import app
 
 socketio = SocketIO(app)
 
-cancel_upload = False
+ftp_pool = FTPPool()
 
-_request_timeout = int(os.getenv("FLASK_CONNECTION_TIMEOUT", 10))
-
-def ftp_upload_progress(client_id, file_path, data, callback):
-    global cancel_upload
+job_store = JobStore()
 
+def ftp_upload(file_path, callback=None, cancel_token=None):
+    "Envia o arquivo por FTP, levantando exceção em caso de falha ou cancelamento."
     filename = os.path.basename(file_path)
-
-    # Lock para garantir que apenas uma thread altere a variável cancel_upload por vez
-    cancel_lock = Lock()
+    cancelled = False
 
     with open(file_path, "rb") as file:
         file_size = os.path.getsize(file_path)
-        uploaded_size = 0
 
         def upload_callback(data):
-            nonlocal uploaded_size
-            uploaded_size += len(data)
-            progress = int((uploaded_size / file_size) * 100)
-            pbar.update(len(data))
-            callback(client_id, progress)
+            nonlocal cancelled
+            reporter.update(len(data))
+
+            if cancel_token is not None and cancel_token.cancelled:
+                cancelled = True
+
+                raise Exception("Upload cancelado pelo usuário")
 
-            with cancel_lock:
-                if cancel_upload:
-                    raise Exception("Upload cancelado pelo usuário")
+        remote_file = None
 
         try:
-            # Configurações do servidor FTP
-            ftp_host = os.getenv("FTP_SERVER_HOST")
-            ftp_user = os.getenv("FTP_SERVER_USER")
-            ftp_pass = os.getenv("FTP_SERVER_PASS")
             ftp_dir = os.getenv("FTP_SERVER_DIR")
 
             # Adiciona uma barra (/) caso a variável 'ftp_dir' não termine com uma
             if not ftp_dir.endswith("/"):
                 ftp_dir += "/"
 
-            ftp = FTP(ftp_host, ftp_user, ftp_pass, timeout=_request_timeout)
+            remote_file = f"{ftp_dir}{filename}"
 
-            with tqdm(total=file_size, unit="B", unit_scale=True, desc=f"Enviando {filename}", leave=False) as pbar:
-                ftp.storbinary(f"STOR {ftp_dir}{os.path.basename(file_path)}", file, callback=upload_callback)
+            with ftp_pool.session() as ftp:
+                with ProgressReporter(file_size, callback or (lambda progress: None), description=f"Enviando {filename}") as reporter, timed("ftp_transfer"):
+                    ftp.storbinary(f"STOR {remote_file}", file, callback=upload_callback)
+        finally:
+            # Remove o arquivo parcial quando o envio foi interrompido pelo cancelamento
+            if cancelled and remote_file is not None:
+                remove_remote_file(remote_file)
 
-            ftp.quit()
+def ftp_upload_progress(client_id, file_path, data, callback, cancel_token=None, correlation_id=None):
+    "Envia o arquivo por FTP e retorna uma tupla (sucesso, mensagem de erro)."
+    with span("ftp_upload", correlation_id, client_id=client_id, file=os.path.basename(file_path)) as record:
+        try:
+            ftp_upload(file_path, lambda progress: callback(client_id, progress), cancel_token)
 
             socketio.emit("success", (data, "Arquivo enviado com sucesso."), to=client_id)
+
+            return True, None
         except Exception as e:
             print(e)
             socketio.emit("error", ("Erro na conexão com o servidor FTP", e.__str__()), to=client_id)
-        finally:
-            with cancel_lock:
-                if cancel_upload:
-                    remove_remote_file(ftp_host, ftp_user, ftp_pass, os.path.join(ftp_dir, os.path.basename(file_path)))
 
-                cancel_upload = False
+            record["status"] = "error"
+            record["error"] = e.__str__()
 
-def remove_remote_file(ftp_host, ftp_user, ftp_pass, remote_file):
+            return False, e.__str__()
+
+def remove_remote_file(remote_file):
     try:
-        ftp = FTP(ftp_host, ftp_user, ftp_pass, timeout=_request_timeout)
-        ftp.delete(remote_file)
-        ftp.quit()
+        with ftp_pool.session() as ftp:
+            ftp.delete(remote_file)
     except Exception as e:
         print(f"Erro ao excluir o arquivo remoto {remote_file}: {e}")
 
-def upload_request(client_id, file_path, data):
-    def progress_callback(client_id, progress):
-        loader(client_id, "Enviando arquivo...", progress)
-
-    client_id = request.sid
-    thread = Thread(target=ftp_upload_progress, args=(client_id, file_path, data, progress_callback))
-    thread.start()
+def upload_progress(client_id, progress):
+    loader(client_id, "Enviando arquivo...", progress)
 
 def loader(client_id, message, progress=None):
     socketio.emit("loader", (message, progress), to=client_id)
 
-@socketio.on("connect")
-def handle_connect():
-    global cancel_upload
+def queue_loader(client_id, position):
+    loader(client_id, f"Aguardando na fila de envio (posição {position})...")
+
+upload_scheduler = UploadScheduler(on_queue=queue_loader)
+
+atexit.register(upload_scheduler.shutdown, wait=False)
+
+def flush_remittance(key, entries, cancel_token=None):
+    """
+    Gera e envia uma única remessa SD1 com os ARs acumulados de um cliente/lote e avisa cada
+    cliente do resultado do seu próprio AR.
+
+    Cada descarregamento recebe do JobStore um número de remessa próprio, usado no nome do
+    arquivo e no sequencial de arquivo dos registros: remessas do mesmo lote não sobrescrevem
+    umas às outras, nem localmente nem no servidor FTP.
+    """
+    client_acronym, shipping = key
+    client_ids = {client_id for client_id, _, _ in entries}
+    correlation_id = new_correlation_id()
+
+    try:
+        number = job_store.create_remittance(client_acronym, shipping, [job_id for _, _, job_id in entries])
+
+        text_ar = TextAR.from_batch([response_data for _, response_data, _ in entries], number, correlation_id)
+
+        for client_id in client_ids:
+            loader(client_id, "Gerando remessa...")
+
+        file_path = text_ar.generate()
+
+        if file_path is False:
+            raise Exception("Ocorreu um erro na geração da remessa!")
+
+        for _, _, job_id in entries:
+            job_store.update(job_id, JobStore.GENERATED, file_path=file_path)
+
+        def progress(progress):
+            for client_id in client_ids:
+                upload_progress(client_id, progress)
+
+        with span("ftp_upload", correlation_id, jobs=[job_id for _, _, job_id in entries], file=os.path.basename(file_path)):
+            ftp_upload(file_path, progress, cancel_token)
+
+        for client_id, response_data, job_id in entries:
+            job_store.update(job_id, JobStore.UPLOADED, attempt=True)
+
+            socketio.emit("success", (success_payload(response_data), "Arquivo enviado com sucesso."), to=client_id)
+    except Exception as e:
+        print(e)
+
+        for client_id, _, job_id in entries:
+            job_store.update(job_id, error=e.__str__(), attempt=True)
+
+            socketio.emit("error", ("Erro na remessa", e.__str__()), to=client_id)
+
+def remittance_key(response_data):
+    "Chave (sigla do cliente, lote) em que o AR é agrupado."
+    return (response_data.client_acronym, response_data.object_data.shipping)
+
+def schedule_remittance(key, entries):
+    client_acronym, shipping = key
+
+    # A remessa é compartilhada: não é cancelada quando um dos clientes se desconecta
+    upload_scheduler.submit(f"remessa {client_acronym} {shipping}", flush_remittance, key, entries)
+
+remittance_buffer = RemittanceBuffer(schedule_remittance) if os.getenv("REMITTANCE_BATCH_MODE", "false").lower() == "true" else None
+"Agrupamento opcional dos envios individuais em remessas (REMITTANCE_BATCH_MODE)"
+
+def response_error(response):
+    "Retorna a mensagem de erro da resposta do e-Cidade ou None em caso de sucesso."
+    if response is None:
+        return "Não foi possível se comunicar com o e-Cidade."
+
+    data = response.get("data")
+
+    if data.get("error"):
+        return data.get("message") or "Erro na inclusão do AR."
+
+    if ("data" in data and "erro" in data.get("data") and data.get("data").get("erro")):
+        return data.get("data").get("message") or "Erro na inclusão do AR."
+
+    return None
+
+def success_payload(response_data):
+    "Dados do evento 'success' em camelCase, de um AR (ARData ou dict) ou de uma lista de ARs."
+    if isinstance(response_data, list):
+        return [success_payload(item) for item in response_data]
+
+    if not isinstance(response_data, ARData):
+        response_data = ARData.from_dict(response_data)
+
+    return response_data.to_camel_case()
+
+def cancel_job(job_id):
+    "Registra o cancelamento do envio, que fica disponível para o 'retry job'."
+    job_store.update(job_id, error="Envio cancelado pelo usuário.")
+
+def generate_and_upload(client_id, text_ar, response_data, cancel_token=None, job_id=None):
+    "Etapas de geração do arquivo SD1 e envio por FTP, comuns ao envio individual e em lote."
+    loader(client_id, "Gerando AR...")
+
+    file_path = text_ar.generate()
+
+    if file_path is False:
+        job_store.update(job_id, error="Erro na geração do AR.", attempt=True)
+        socketio.emit("error", ("Erro AR", "Ocorreu um erro na geração do AR!"), to=client_id)
+        return
+
+    job_store.update(job_id, JobStore.GENERATED, file_path=file_path)
+
+    if cancel_token is not None and cancel_token.cancelled:
+        cancel_job(job_id)
+        return
+
+    upload_job(client_id, file_path, response_data, cancel_token, job_id, text_ar.correlation_id)
+
+def upload_job(client_id, file_path, response_data, cancel_token=None, job_id=None, correlation_id=None):
+    "Etapa de envio por FTP de um arquivo já gerado, registrando o resultado no JobStore."
+    loader(client_id, "Enviando arquivo...")
+
+    data = success_payload(response_data)
+
+    success, error = ftp_upload_progress(client_id, file_path, data, upload_progress, cancel_token, correlation_id)
+
+    if success:
+        job_store.update(job_id, JobStore.UPLOADED, attempt=True)
+    else:
+        job_store.update(job_id, error=error, attempt=True)
+
+def map_response(data, kind="single"):
+    "Mapeia a resposta bruta do e-Cidade (uma lista no envio em lote) em ARData."
+    if kind == "batch":
+        return [map_response(item) for item in data]
+
+    with timed("mapping"):
+        return ResponseData(data).get_records()
+
+def record_mapping(job_id, data, kind="single"):
+    "Mapeia a resposta bruta do envio registrado e grava os dados mapeados no JobStore."
+    response_data = map_response(data, kind)
+
+    job_store.update(job_id, response_data=[item.to_dict() for item in response_data] if kind == "batch" else response_data.to_dict())
+
+    return response_data
+
+def _text_ar(job, correlation_id=None):
+    response_data = job["response_data"]
+
+    if job["kind"] == "batch":
+        return TextAR.from_batch(response_data, job["shipping"], correlation_id)
+
+    return TextAR(response_data, correlation_id)
+
+_running_jobs = set()
+"Envios registrados que estão sendo retomados ou reenviados neste processo"
 
-    cancel_upload = False
+_running_jobs_lock = Lock()
 
+def _claim_job(job_id):
+    "Marca o envio como em andamento; retorna False se ele já estiver sendo retomado."
+    with _running_jobs_lock:
+        if job_id in _running_jobs:
+            return False
+
+        _running_jobs.add(job_id)
+
+        return True
+
+def _release_job(job_id):
+    with _running_jobs_lock:
+        _running_jobs.discard(job_id)
+
+def resume_job(client_id, job, cancel_token=None):
+    "Retoma um envio registrado a partir da etapa em que parou, sem chamar o e-Cidade novamente."
+    if not _claim_job(job["id"]):
+        socketio.emit("error", ("Erro!", f"O envio {job['id']} já está em andamento."), to=client_id)
+        return
+
+    try:
+        # O envio pode ter sido concluído por outra tentativa enquanto este aguardava na fila
+        job = job_store.get(job["id"])
+
+        if job["stage"] == JobStore.UPLOADED:
+            socketio.emit("error", ("Erro!", f"O envio {job['id']} já foi concluído."), to=client_id)
+            return
+
+        correlation_id = new_correlation_id()
+
+        print(f"Retomando o envio {job['id']} (correlation_id {correlation_id}).")
+
+        # Envio registrado antes do mapeamento da resposta do e-Cidade
+        if job["response_data"] is None:
+            record_mapping(job["id"], job["ecidade_response"], job["kind"])
+
+            job = job_store.get(job["id"])
+
+        response_data = job["response_data"]
+        file_path = job["file_path"]
+
+        # O arquivo da remessa agrupada é compartilhado: gera uma nova remessa apenas com este AR
+        if job["kind"] == "remittance":
+            response_data = ARData.from_dict(response_data)
+
+            flush_remittance(remittance_key(response_data), [(client_id, response_data, job["id"])], cancel_token)
+        # Arquivo já gerado: apenas reenvia
+        elif file_path and os.path.exists(file_path):
+            upload_job(client_id, file_path, response_data, cancel_token, job["id"], correlation_id)
+        else:
+            generate_and_upload(client_id, _text_ar(job, correlation_id), response_data, cancel_token, job["id"])
+    except Exception as e:
+        print(e)
+        job_store.update(job["id"], error=e.__str__(), attempt=True)
+        socketio.emit("error", ("Erro!", e.__str__()), to=client_id)
+    finally:
+        _release_job(job["id"])
+
+def resume_jobs():
+    "Agenda a retomada dos envios pendentes que não excederam JOB_MAX_ATTEMPTS (chamado na inicialização)."
+    jobs = job_store.pending()
+
+    for job in jobs:
+        upload_scheduler.submit(job["client_id"], resume_job, job["client_id"], job)
+
+    if jobs:
+        print(f"{len(jobs)} envio(s) pendente(s) retomado(s).")
+
+    return len(jobs)
+
+def process_submission(client_id, json_data, correlation_id=None, cancel_token=None):
+    "Executa em segundo plano a inclusão no e-Cidade, a geração do AR e o envio do arquivo."
+    job_id = None
+
+    try:
+        loader(client_id, "Incluindo AR...")
+
+        response = include(json_data, correlation_id)
+        message = response_error(response)
+
+        if message is not None:
+            count_error("inclusion", "e-Cidade")
+            socketio.emit("error", ("Erro!", message), to=client_id)
+            return
+
+        # O AR já está no e-Cidade: o envio é registrado com a resposta bruta antes do mapeamento
+        # e de qualquer cancelamento
+        kind = "single" if remittance_buffer is None else "remittance"
+        job_id = job_store.create(client_id, None, kind, ecidade_response=response.get("data"))
+
+        if cancel_token is not None and cancel_token.cancelled:
+            cancel_job(job_id)
+            return
+
+        loader(client_id, "Preparando...")
+
+        response_data = record_mapping(job_id, response.get("data"), kind)
+
+        if remittance_buffer is not None:
+            loader(client_id, "Aguardando o envio da remessa...")
+
+            remittance_buffer.add(remittance_key(response_data), (client_id, response_data, job_id))
+            return
+
+        text_ar = TextAR(response_data, correlation_id)
+
+        generate_and_upload(client_id, text_ar, response_data, cancel_token, job_id)
+    except Exception as e:
+        print(e)
+        job_store.update(job_id, error=e.__str__(), attempt=True)
+        socketio.emit("error", ("Erro!", e.__str__()), to=client_id)
+
+def process_batch(client_id, json_data, shipping=None, correlation_id=None, cancel_token=None):
+    "Executa em segundo plano a inclusão de vários ARs e o envio de uma única remessa SD1."
+    job_id = None
+
+    try:
+        loader(client_id, f"Incluindo {len(json_data)} ARs...")
+
+        responses = include_many(json_data, correlation_id=correlation_id)
+        included = []
+
+        for item, response in zip(json_data, responses):
+            message = response_error(response)
+
+            if message is None:
+                included.append(response.get("data"))
+            else:
+                count_error("inclusion", "e-Cidade")
+                socketio.emit("error", (f"Erro no destinatário {item.get('destinatario')}", message), to=client_id)
+
+        if not included:
+            return
+
+        # Os ARs já estão no e-Cidade: o envio é registrado com as respostas brutas antes do
+        # mapeamento e de qualquer cancelamento
+        job_id = job_store.create(client_id, None, "batch", shipping, included)
+
+        if cancel_token is not None and cancel_token.cancelled:
+            cancel_job(job_id)
+            return
+
+        response_items = record_mapping(job_id, included, "batch")
+
+        text_ar = TextAR.from_batch(response_items, shipping, correlation_id)
+
+        generate_and_upload(client_id, text_ar, response_items, cancel_token, job_id)
+    except Exception as e:
+        print(e)
+        job_store.update(job_id, error=e.__str__(), attempt=True)
+        socketio.emit("error", ("Erro!", e.__str__()), to=client_id)
+
+@socketio.on("connect")
+def handle_connect():
     print(f"Cliente {request.sid} conectado.")
 
 @socketio.on("disconnect")
 def handle_disconnect():
-    global cancel_upload
-
-    cancel_upload = True
-
     client_id = request.sid
 
+    # Cancela apenas os envios deste cliente
+    upload_scheduler.cancel(client_id)
+
     print(f"Cliente {client_id} desconectado.")
 
 @socketio.on("send data")
 def handle_send_data(data):
     client_id = request.sid
 
+    # Identifica o envio nos logs, no e-Cidade (X-Correlation-ID), na geração do AR e no FTP
+    correlation_id = new_correlation_id()
+
     print(data)
 
-    json_model = FormData(data)
+    with span("validation", correlation_id, client_id=client_id) as record, timed("validation"):
+        json_model = FormData(data)
+        valid = json_model.is_valid()
+
+        record["valid"] = valid
+
+    if valid is False:
+        count_error("validation", "invalid document")
 
-    if json_model.is_valid() is False:
         type = json_model.get_doc_type()
 
         message = f"O {type} {json_model.cpfcnpj} não é válido!"
 
         socketio.emit("invalid document", (message), to=client_id)
     else:
-        json_data = json_model.get_data()
-        response = include(json_data)
-        data = response.get("data")
+        # As etapas seguintes rodam no pool de workers, liberando o handler imediatamente
+        upload_scheduler.submit(client_id, process_submission, client_id, json_model.get_data(), correlation_id)
+
+@socketio.on("send batch")
+def handle_send_batch(data):
+    """
+    Recebe uma lista de formulários (ou {"shipping": lote, "items": [...]}) e gera uma única
+    remessa SD1 com todos os ARs incluídos, enviada em uma única sessão FTP.
+    """
+    client_id = request.sid
+    shipping = None
 
-        error = None
-        message = None
+    if isinstance(data, dict):
+        shipping = data.get("shipping")
+        data = data.get("items", [])
 
-        if data.get("error"):
-            message = data.get("message")
-            error = True
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        socketio.emit("error", ("Erro!", "O envio em lote deve conter uma lista de destinatários."), to=client_id)
+        return
 
-        if ("data" in data and "erro" in data.get("data") and data.get("data").get("erro")):
-            message = data.get("data").get("message")
-            error = True
+    correlation_id = new_correlation_id()
 
-        if error is None:
-            loader(client_id, "Preparando...")
+    with span("validation", correlation_id, client_id=client_id, items=len(data)) as record, timed("validation"):
+        valid = validate_many([item.get("document") for item in data])
 
-            response_data = ResponseData(data)
-            response_data = response_data.get_data()
+        json_models = [FormData(item, item_valid) for item, item_valid in zip(data, valid)]
+        invalid = [json_model for json_model in json_models if json_model.is_valid() is False]
 
-            text_ar = TextAR(response_data)
+        record["invalid"] = len(invalid)
 
-            loader(client_id, "Gerando AR...")
+    if not json_models:
+        socketio.emit("error", ("Erro!", "Nenhum destinatário informado."), to=client_id)
+        return
 
-            file_path = text_ar.generate()
+    if invalid:
+        count_error("validation", "invalid document", len(invalid))
 
-            if file_path is not False:
-                loader(client_id, "Enviando arquivo...")
+        message = "\n".join(f"O {json_model.get_doc_type()} {json_model.cpfcnpj} não é válido!" for json_model in invalid)
 
-                data = CaseConverter.convert_keys(response_data, CaseConverter.to_camel_case)
+        socketio.emit("invalid document", (message), to=client_id)
+        return
 
-                upload_request(client_id, file_path, data)
-            else:
-                socketio.emit("error", ("Erro AR", "Ocorreu um erro na geração do AR!"), to=client_id)
-        else:
-            socketio.emit("error", ("Erro!", message), to=client_id)
\ No newline at end of file
+    upload_scheduler.submit(client_id, process_batch, client_id, [json_model.get_data() for json_model in json_models], shipping, correlation_id)
+
+@socketio.on("retry job")
+def handle_retry_job(job_id):
+    "Reenvia um envio registrado (por exemplo, após falha no FTP) sem nova inclusão no e-Cidade."
+    client_id = request.sid
+    job = job_store.get(job_id)
+
+    if job is None:
+        socketio.emit("error", ("Erro!", f"Envio {job_id} não encontrado."), to=client_id)
+    elif job["stage"] == JobStore.UPLOADED:
+        socketio.emit("error", ("Erro!", f"O envio {job_id} já foi concluído."), to=client_id)
+    elif job["error"] is None or job["id"] in _running_jobs:
+        # Sem erro registrado o envio ainda está na sua primeira tentativa (ou sendo retomado)
+        socketio.emit("error", ("Erro!", f"O envio {job_id} já está em andamento."), to=client_id)
+    else:
+        upload_scheduler.submit(client_id, resume_job, client_id, job)
@@ -1,3 +1,7 @@
+import sys
+from types import MappingProxyType
+
+
 class Table():
     "Classe para consultar motivos de baixa e devolução."
     REASONS_FOR_DISCHARGE = {
@@ -37,8 +41,87 @@ class Table():
 
     def load_reasons(self):
         "Carrega os motivos apropriados (baixa ou devolução) no dicionário de motivos."
-        self.reasons = {**self.REASONS_FOR_DISCHARGE, **self.REASONS_FOR_RETURN}
+        self.reasons = _reasons.reasons
 
     def lookup_reason(self, code):
-        "Consulta e retorna o motivo associado ao código fornecido."
-        return self.reasons.get(code, f"Código ({code}) desconhecido")
+        "Consulta e retorna o motivo associado ao código fornecido (baixa ou devolução)."
+        return _reasons.lookup(code)
+
+    def lookup_discharge(self, code):
+        "Consulta apenas os motivos de baixa."
+        return discharge_reasons.lookup(code)
+
+    def lookup_return(self, code):
+        "Consulta apenas os motivos de devolução."
+        return return_reasons.lookup(code)
+
+
+class ReasonIndex():
+    """
+    Índice imutável de uma tabela de motivos, com uma posição por código de dois dígitos (00 a 99).
+
+    As descrições (inclusive as de códigos desconhecidos) são montadas e internadas uma única vez.
+    """
+    __slots__ = ("reasons", "_by_code", "_by_position")
+
+    def __init__(self, reasons):
+        self.reasons = MappingProxyType({code: sys.intern(description) for code, description in reasons.items()})
+
+        codes = [f"{code:02d}" for code in range(100)]
+
+        self._by_position = tuple(self.reasons[code] if code in self.reasons else sys.intern(self._unknown(code)) for code in codes)
+        self._by_code = MappingProxyType({**dict(zip(codes, self._by_position)), **self.reasons})
+
+    @staticmethod
+    def _unknown(code):
+        return f"Código ({code}) desconhecido"
+
+    def lookup(self, code):
+        "Retorna a descrição do código (str de dois dígitos) ou a mensagem de código desconhecido."
+        description = self._by_code.get(code)
+
+        if description is None:
+            return self._unknown(code)
+
+        return description
+
+    def lookup_many(self, codes):
+        """
+        Consulta em lote os códigos de uma coluna (ex.: resultado de TextAR.get_columns).
+
+        Args:
+            codes (numpy.ndarray or list): Códigos como strings.
+
+        Returns:
+            numpy.ndarray: As descrições, na mesma ordem dos códigos.
+        """
+        import numpy as np
+
+        codes = np.asarray(codes, dtype=str)
+
+        if codes.size == 0:
+            return np.array([], dtype=str)
+
+        # Códigos de exatamente dois dígitos viram a posição no índice; os demais são tratados um a um
+        chars = np.ascontiguousarray(codes.astype("U2")).view(np.uint32).reshape(-1, 2).astype(np.int64) - ord("0")
+        valid = (np.char.str_len(codes) == 2) & ((chars >= 0) & (chars <= 9)).all(axis=1)
+        positions = np.where(valid, chars[:, 0] * 10 + chars[:, 1], 0)
+
+        descriptions = np.array(self._by_position, dtype=object)[positions]
+
+        for index in np.flatnonzero(~valid):
+            descriptions[index] = self.lookup(str(codes[index]))
+
+        return descriptions.astype(str)
+
+
+discharge_reasons = ReasonIndex(Table.REASONS_FOR_DISCHARGE)
+"Motivos de baixa (codigo_da_baixa do arquivo de retorno)"
+
+return_reasons = ReasonIndex(Table.REASONS_FOR_RETURN)
+"Motivos de devolução (motivo_devolucao do arquivo de retorno)"
+
+_reasons = ReasonIndex({**Table.REASONS_FOR_DISCHARGE, **Table.REASONS_FOR_RETURN})
+
+table = Table()
+"Instância compartilhada (a tabela é imutável)"
@@ -0,0 +1,170 @@
+import random
+import re
+
+import pytest
+
+from utils.cpf_cnpj import validate_cnpj, validate_cpf, validate_document, validate_many
+
+
+# Implementação anterior às tabelas de pesos, usada como referência de paridade
+def legacy_validate_cpf(cpf):
+    v1 = 0
+    v2 = 0
+    aux = False
+
+    for i in range(1, len(cpf)):
+        if cpf[i - 1] != cpf[i]:
+            aux = True
+
+    if not aux:
+        return False
+
+    for i in range(len(cpf) - 2):
+        v1 += int(cpf[i]) * (10 - i)
+
+    v1 = ((v1 * 10) % 11)
+
+    if v1 == 10:
+        v1 = 0
+
+    if v1 != int(cpf[9]):
+        return False
+
+    for i in range(len(cpf) - 1):
+        v2 += int(cpf[i]) * (11 - i)
+
+    v2 = ((v2 * 10) % 11)
+
+    if v2 == 10:
+        v2 = 0
+
+    return v2 == int(cpf[10])
+
+def legacy_validate_cnpj(cnpj):
+    v1 = 0
+    v2 = 0
+    aux = False
+
+    for i in range(1, len(cnpj)):
+        if cnpj[i - 1] != cnpj[i]:
+            aux = True
+
+    if not aux:
+        return False
+
+    p1 = 5
+    p2 = 13
+    for i in range(len(cnpj) - 2):
+        if p1 >= 2:
+            v1 += int(cnpj[i]) * p1
+        else:
+            v1 += int(cnpj[i]) * p2
+        p1 -= 1
+        p2 -= 1
+
+    v1 = (v1 % 11)
+    v1 = 0 if v1 < 2 else 11 - v1
+
+    if v1 != int(cnpj[12]):
+        return False
+
+    p1 = 6
+    p2 = 14
+    for i in range(len(cnpj) - 1):
+        if p1 >= 2:
+            v2 += int(cnpj[i]) * p1
+        else:
+            v2 += int(cnpj[i]) * p2
+        p1 -= 1
+        p2 -= 1
+
+    v2 = (v2 % 11)
+    v2 = 0 if v2 < 2 else 11 - v2
+
+    return v2 == int(cnpj[13])
+
+def legacy_validate_document(document):
+    document = re.sub(r'[^0-9]', '', document)
+    length = len(document)
+
+    if length == 14:
+        return legacy_validate_cnpj(document)
+
+    if length == 11:
+        return legacy_validate_cpf(document)
+
+    if length < 11:
+        return legacy_validate_document(document.ljust(11, "0"))
+
+    if length < 14:
+        return legacy_validate_document(document.ljust(14, "0"))
+
+    return False
+
+
+def valid_documents(length, count, rng):
+    "Gera documentos válidos testando os dígitos verificadores com a implementação de referência."
+    validate = legacy_validate_cpf if length == 11 else legacy_validate_cnpj
+    documents = []
+
+    while len(documents) < count:
+        base = "".join(rng.choice("0123456789") for _ in range(length - 2))
+
+        for suffix in (f"{a}{b}" for a in "0123456789" for b in "0123456789"):
+            if validate(base + suffix):
+                documents.append(base + suffix)
+                break
+
+    return documents
+
+def parity_inputs():
+    rng = random.Random(20)
+    inputs = []
+
+    # Todos os tamanhos (inclusive os completados com zeros) com dígitos repetidos
+    for length in range(0, 17):
+        inputs.extend(digit * length for digit in "0123456789")
+
+    # Documentos válidos e todas as suas substituições de um único dígito
+    for length in (11, 14):
+        for document in valid_documents(length, 60, rng):
+            inputs.append(document)
+
+            for position in range(length):
+                inputs.extend(document[:position] + digit + document[position + 1:] for digit in "0123456789")
+
+    # Dígitos aleatórios de todos os tamanhos
+    for length in range(1, 17):
+        inputs.extend("".join(rng.choice("0123456789") for _ in range(length)) for _ in range(500))
+
+    # Com pontuação, espaços e letras (descartados antes da validação)
+    for document in list(inputs[-4000:]):
+        inputs.append(f"{document[:3]}.{document[3:6]}.{document[6:9]}-{document[9:]}")
+        inputs.append(f" {document[:2]}a/{document[2:]} ")
+
+    return inputs
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    return parity_inputs()
+
+
+def test_validate_document_matches_legacy(inputs):
+    assert [validate_document(document) for document in inputs] == [legacy_validate_document(document) for document in inputs]
+
+
+def test_validate_many_matches_validate_document(inputs):
+    assert validate_many(inputs) == [validate_document(document) for document in inputs]
+
+
+def test_validate_cpf_and_cnpj_match_legacy(inputs):
+    for document in inputs:
+        if len(document) == 11 and document.isdigit():
+            assert validate_cpf(document) == legacy_validate_cpf(document)
+        elif len(document) == 14 and document.isdigit():
+            assert validate_cnpj(document) == legacy_validate_cnpj(document)
+
+
+def test_known_documents():
+    assert validate_many(["845.882.361-64", "11.222.333/0001-81", "845.882.361-65", "000.000.000-00", ""]) == [True, True, False, False, False]
@@ -0,0 +1,99 @@
+import io
+import threading
+import time
+
+import pytest
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.servers import FTPServer
+
+from ftp_pool import FTPPool
+
+
+@pytest.fixture
+def ftp_server(tmp_path):
+    "Servidor FTP local de teste: registra os logins e os arquivos recebidos."
+    authorizer = DummyAuthorizer()
+    authorizer.add_user("user", "pass", str(tmp_path), perm="elradfmw")
+
+    logins = []
+
+    class Handler(FTPHandler):
+        timeout = 2
+
+        def on_login(self, username):
+            logins.append(username)
+
+    Handler.authorizer = authorizer
+
+    server = FTPServer(("127.0.0.1", 0), Handler)
+    server.logins = logins
+    server.directory = tmp_path
+    server.handler = Handler
+
+    thread = threading.Thread(target=server.serve_forever, kwargs={"timeout": 0.05}, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.close_all()
+    thread.join(5)
+
+
+def logins(server, expected):
+    "Quantidade de logins registrados, aguardando o servidor processar o último (on_login roda após a resposta)."
+    deadline = time.monotonic() + 2
+
+    while len(server.logins) < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # Tempo para um eventual login além do esperado
+    time.sleep(0.05)
+
+    return len(server.logins)
+
+
+@pytest.fixture
+def pool(ftp_server):
+    ftp_pool = FTPPool("127.0.0.1", "user", "pass", ftp_server.address[1], size=2, timeout=5)
+
+    yield ftp_pool
+
+    ftp_pool.close()
+
+
+def test_reuses_authenticated_session(ftp_server, pool):
+    for number in range(5):
+        with pool.session() as ftp:
+            ftp.storbinary(f"STOR ar_{number}.SD1", io.BytesIO(b"8" * 270))
+
+    assert logins(ftp_server, 1) == 1
+    assert sorted(path.name for path in ftp_server.directory.iterdir()) == [f"ar_{number}.SD1" for number in range(5)]
+
+
+def test_replaces_dead_session(ftp_server, pool):
+    with pool.session() as ftp:
+        ftp.voidcmd("NOOP")
+
+    # O servidor encerra a sessão ociosa após o timeout: o NOOP do pool falha e uma nova sessão é aberta
+    time.sleep(ftp_server.handler.timeout + 1)
+
+    with pool.session() as ftp:
+        ftp.storbinary("STOR ar.SD1", io.BytesIO(b"8" * 270))
+
+    assert logins(ftp_server, 2) == 2
+    assert (ftp_server.directory / "ar.SD1").exists()
+
+
+def test_discards_session_on_error(ftp_server, pool):
+    with pytest.raises(RuntimeError):
+        with pool.session() as ftp:
+            failed = ftp
+            raise RuntimeError("falha no envio")
+
+    assert failed.sock is None
+
+    with pool.session() as ftp:
+        assert ftp is not failed
+
+    assert logins(ftp_server, 2) == 2
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+
+from generate import TextAR
+
+
+# Linhas geradas pela implementação anterior (TextAR.set_text) para os mesmos dados
+CASES = [
+    (
+        "include",
+        datetime(2024, 1, 5),
+        {
+            "client-acronym": "XX",
+            "return-data": {},
+            "object-data": {
+                "client-code": 1234, "client-name": "Prefeitura Municipal de São Cristóvão", "client-identifier": "ABCD",
+                "shipping": 12, "object-acronym": "SR", "object-number": 1234567, "free-content": "Notificação nº 42"
+            },
+            "recipient-data": {
+                "name": "José da Conceição", "zip-code": "71937-720", "street": "Avenida Central", "number": "42",
+                "complement": "Apto 101", "neighborhood": "Asa Sul", "city": "Brasília", "state": "DF"
+            }
+        },
+        [
+            "81234000000000000000PREFEITURA MUNICIPAL DE SÃO CRISTÓVÃO   202401050000020000000000000000"
+            "000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000"
+            "000000000000000000000000000000000000000000000000000000000000000000000000000000000120000001",
+            "91234ABCD    SR001234567BR1101NOTIFICAÇÃO Nº 42                                           "
+            "JOSE DA CONCEICAO                       AVENIDA CENTRAL 42 APTO 101 ASA SUL BRASILIA      "
+            "                              BRASILIA                      DF7193772000000000000120000002"
+        ]
+    ),
+    (
+        "exclude",
+        datetime(2023, 12, 31),
+        {
+            "client-acronym": "XX",
+            "return-data": {},
+            "object-data": {
+                "client-code": 7, "client-name": "Câmara Municipal de Vereadores do Município de Nossa Senhora",
+                "client-identifier": "IDENTIFICADOR", "shipping": 3, "object-acronym": "ar", "object-number": 99999999,
+                "free-content": "x" * 70
+            },
+            "recipient-data": {
+                "name": "Maria Aparecida dos Santos Nascimento de Oliveira", "zip-code": "49.000-000",
+                "street": "Rua Desembargador Maynard de Souza Leão Filho, Loteamento", "number": "1234", "complement": "",
+                "neighborhood": "Jardim Botânico das Flores", "city": "São Cristóvão", "state": "se"
+            }
+        },
+        [
+            "80007000000000000000CÂMARA MUNICIPAL DE VEREADORES DO MUNICÍ202312310000020000000000000000"
+            "000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000"
+            "000000000000000000000000000000000000000000000000000000000000000000000000000000000030000001",
+            "90007IDENTIFIAR099999999BR1102XXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX"
+            "MARIA APARECIDA DOS SANTOS NASCIMENTO DERUA DESEMBARGADOR MAYNARD DE SOUZA LEAO FILHO, LOT"
+            "EAMENTO 1234  JARDIM BOTANICO SAO CRISTOVAO                 SE4900000000000000000030000002"
+        ]
+    )
+]
+
+
+@pytest.mark.parametrize("type, date, data, expected", CASES)
+def test_lines_match_legacy_output(type, date, data, expected):
+    text_ar = TextAR(data)
+    text_ar.date = date
+
+    lines = list(text_ar.iter_lines(type))
+
+    assert [len(line) for line in lines] == [270, 270]
+    assert lines == expected
+
+
+@pytest.mark.parametrize("type, date, data, expected", CASES)
+def test_generate_writes_legacy_output(tmp_path, type, date, data, expected):
+    text_ar = TextAR(data)
+    text_ar.date = date
+
+    file_path = text_ar.generate(type, directory=str(tmp_path))
+
+    with open(file_path, "r", encoding="cp1252") as file:
+        assert file.read() == "\n".join(expected)
@@ -0,0 +1,158 @@
+import sqlite3
+
+import pytest
+
+from job_store import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    job_store = JobStore(str(tmp_path / "jobs.sqlite3"), max_attempts=3)
+
+    yield job_store
+
+    job_store.close()
+
+
+def test_create_and_get(store):
+    job_id = store.create("sid", {"client-acronym": "XX"}, "batch", 12, ecidade_response={"data": {"lote": 12}})
+    job = store.get(job_id)
+
+    assert job["client_id"] == "sid"
+    assert job["kind"] == "batch"
+    assert job["stage"] == JobStore.INCLUDED
+    assert job["shipping"] == 12
+    assert job["response_data"] == {"client-acronym": "XX"}
+    assert job["ecidade_response"] == {"data": {"lote": 12}}
+    assert job["error"] is None
+    assert job["attempts"] == 0
+    assert store.get(job_id + 1) is None
+
+
+def test_update_records_stage_file_data_and_error(store):
+    job_id = store.create("sid", None)
+
+    store.update(job_id, response_data={"client-acronym": "XX"})
+    store.update(job_id, JobStore.GENERATED, file_path="ftp_files/XX.SD1")
+
+    job = store.get(job_id)
+
+    assert job["stage"] == JobStore.GENERATED
+    assert job["file_path"] == "ftp_files/XX.SD1"
+    assert job["response_data"] == {"client-acronym": "XX"}
+
+    store.update(job_id, error="falha", attempt=True)
+
+    job = store.get(job_id)
+
+    assert job["stage"] == JobStore.GENERATED
+    assert job["error"] == "falha"
+    assert job["attempts"] == 1
+
+    # Uma nova etapa sem erro limpa o erro anterior
+    store.update(job_id, JobStore.UPLOADED, attempt=True)
+
+    job = store.get(job_id)
+
+    assert job["stage"] == JobStore.UPLOADED
+    assert job["error"] is None
+    assert job["attempts"] == 2
+
+
+def test_update_without_job_is_ignored(store):
+    store.update(None, error="falha", attempt=True)
+
+
+def test_pending_excludes_uploaded_and_failed(store):
+    included = store.create("a", {})
+    generated = store.create("b", {})
+    uploaded = store.create("c", {})
+
+    store.update(generated, JobStore.GENERATED, file_path="x.SD1")
+    store.update(uploaded, JobStore.UPLOADED, attempt=True)
+
+    assert [job["id"] for job in store.pending()] == [included, generated]
+
+
+def test_failed_after_max_attempts(store):
+    job_id = store.create("sid", {})
+
+    for attempt in range(1, store.max_attempts):
+        store.update(job_id, error="falha", attempt=True)
+
+        assert store.get(job_id)["stage"] == JobStore.INCLUDED
+        assert store.get(job_id)["attempts"] == attempt
+
+    store.update(job_id, error="falha", attempt=True)
+
+    assert store.get(job_id)["stage"] == JobStore.FAILED
+    assert store.pending() == []
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first = JobStore(path)
+    job_id = first.create("sid", {"a": 1})
+    first.close()
+
+    second = JobStore(path)
+
+    assert [job["id"] for job in second.pending()] == [job_id]
+
+    second.close()
+
+
+def test_migrates_databases_without_new_columns(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    # Esquema anterior às remessas agrupadas e à resposta bruta do e-Cidade
+    connection = sqlite3.connect(path)
+    connection.execute("""
+        CREATE TABLE jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id TEXT,
+            kind TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            response_data TEXT NOT NULL,
+            shipping INTEGER,
+            file_path TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+    connection.execute(
+        "INSERT INTO jobs (client_id, kind, stage, response_data, created_at, updated_at) VALUES ('sid', 'single', 'included', '{}', 0, 0)"
+    )
+    connection.commit()
+    connection.close()
+
+    store = JobStore(path)
+    job = store.pending()[0]
+
+    assert job["remittance_id"] is None
+    assert job["ecidade_response"] is None
+
+    store.create_remittance("XX", 1, [job["id"]])
+
+    assert store.get(job["id"])["remittance_id"] is not None
+
+    store.close()
+
+
+def test_create_remittance_numbers_per_client(store):
+    jobs = [store.create("sid", {}, "remittance") for _ in range(3)]
+
+    # A primeira remessa do cliente mantém o número do lote; as seguintes são crescentes
+    assert store.create_remittance("XX", 7, jobs[:2]) == 7
+    assert store.create_remittance("XX", 7, jobs[2:]) == 8
+    assert store.create_remittance("XX", 3, []) == 9
+    assert store.create_remittance("XX", 20, []) == 20
+    assert store.create_remittance("YY", 7, []) == 7
+    assert store.create_remittance("ZZ", None, []) == 1
+
+    first, second, third = (store.get(job_id)["remittance_id"] for job_id in jobs)
+
+    assert first == second
+    assert third != first
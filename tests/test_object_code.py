@@ -0,0 +1,70 @@
+import pytest
+
+from utils.object_code import object_code, object_codes, validate_object_code, validate_object_codes, verification_digit, verification_digits
+
+
+# Implementação anterior (ResponseData.calculate_verification_digit), usada como referência de paridade
+def legacy_verification_digit(registration_number):
+    if not (1 <= len(registration_number) <= 8):
+        raise ValueError("O número de registro deve conter de 1 a 8 dígitos.")
+
+    weights = [8, 6, 4, 2, 3, 5, 9, 7]
+    registration_number = registration_number.zfill(8)
+    total = 0
+
+    for i in range(8):
+        total += int(registration_number[i]) * weights[i]
+
+    remainder = total % 11
+
+    if remainder == 0:
+        return 5
+    elif remainder == 1:
+        return 0
+    else:
+        return 11 - remainder
+
+
+NUMBERS = sorted(set(range(0, 10 ** 8, 9973)) | set(range(1000)) | set(range(10 ** 8 - 1000, 10 ** 8)))
+"Faixa 0..99999999 com passo primo, mais as extremidades completas"
+
+
+def test_verification_digit_matches_legacy():
+    assert [verification_digit(str(number)) for number in NUMBERS] == [legacy_verification_digit(str(number)) for number in NUMBERS]
+
+
+def test_verification_digits_match_scalar():
+    assert verification_digits(NUMBERS).tolist() == [verification_digit(str(number)) for number in NUMBERS]
+
+
+@pytest.mark.parametrize("start, count", [(0, 1000), (12345678, 2500), (10 ** 8 - 1000, 1000), (500, 0)])
+def test_object_codes_match_scalar(start, count):
+    assert list(object_codes("SR", start, count)) == [object_code("SR", number) for number in range(start, start + count)]
+
+
+def test_validate_object_codes_match_scalar():
+    codes = [object_code("SR", number) for number in NUMBERS]
+
+    # Cada código com o DV trocado (apenas um dos dez valores é válido)
+    codes += [code[:10] + str((int(code[10]) + 1) % 10) + code[11:] for code in codes]
+
+    codes += [
+        "sr123456785br", "Sr123456785BR", "SR123456785bR",
+        "SR12345678BR", "SR1234567855BR", "SR123456785BR ", " SR123456785BR", "SR123456785BR\n", "",
+        None, 123456785, b"SR123456785BR",
+        "SR١٢٣٤٥٦٧٨٥BR", "SR１２３４５６７８５BR", "ÁR123456785BR", "SR12345678XBR", "SR123456785BRA"
+    ]
+
+    assert validate_object_codes(codes) == [validate_object_code(code) for code in codes]
+    assert validate_object_codes([]) == []
+
+
+def test_range_errors():
+    with pytest.raises(ValueError):
+        verification_digits([10 ** 8])
+
+    with pytest.raises(ValueError):
+        verification_digits([-1])
+
+    with pytest.raises(ValueError):
+        object_codes("SR", 10 ** 8 - 10, 11)
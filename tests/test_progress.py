@@ -0,0 +1,62 @@
+import progress
+from progress import ProgressReporter
+
+
+class Clock():
+    "Relógio controlado pelo teste no lugar de time.monotonic."
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def reporter(monkeypatch, total=100, step=5, interval=0.25):
+    clock = Clock()
+    emitted = []
+
+    monkeypatch.setattr(progress.time, "monotonic", clock)
+
+    return ProgressReporter(total, emitted.append, step=step, interval=interval, bar=False), emitted, clock
+
+
+def test_coalesces_by_step(monkeypatch):
+    progress_reporter, emitted, clock = reporter(monkeypatch, interval=0)
+
+    for _ in range(100):
+        clock.now += 1
+        progress_reporter.update(1)
+
+    assert emitted == [1, 6, 11, 16, 21, 26, 31, 36, 41, 46, 51, 56, 61, 66, 71, 76, 81, 86, 91, 96, 100]
+    assert progress_reporter.emitted == len(emitted)
+
+
+def test_coalesces_by_interval(monkeypatch):
+    progress_reporter, emitted, clock = reporter(monkeypatch, step=0, interval=1)
+
+    # Dez atualizações a cada segundo: apenas a primeira de cada segundo é emitida
+    for _ in range(99):
+        clock.now += 0.1
+        progress_reporter.update(1)
+
+    assert len(emitted) == 10
+    assert progress_reporter.emitted == len(emitted)
+
+
+def test_always_emits_first_and_last(monkeypatch):
+    progress_reporter, emitted, _ = reporter(monkeypatch, total=1000, step=50, interval=60)
+
+    for _ in range(1000):
+        progress_reporter.update(1)
+
+    assert emitted == [0, 100]
+    assert progress_reporter.emitted == 2
+
+
+def test_empty_file_emits_completion(monkeypatch):
+    progress_reporter, emitted, _ = reporter(monkeypatch, total=0)
+
+    progress_reporter.update(0)
+
+    assert emitted == [100]
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from benchmark import return_file
+from generate import TextAR
+
+COUNT = 25
+
+
+@pytest.fixture(scope="module")
+def lines(tmp_path_factory):
+    "Registros de um arquivo de retorno sintético (header, detalhes e trailer), sem quebras de linha."
+    path = tmp_path_factory.mktemp("retorno") / "retorno.txt"
+    return_file(str(path), COUNT)
+
+    return path.read_text(encoding="utf-8").splitlines()
+
+
+@pytest.fixture(params=["\n", "\r\n"], ids=["LF", "CRLF"])
+def newline(request):
+    return request.param
+
+
+@pytest.fixture(params=["terminated", "unterminated", "trailing blank line"])
+def return_path(request, tmp_path, lines, newline):
+    ending = {"terminated": newline, "unterminated": "", "trailing blank line": newline * 2}[request.param]
+    path = tmp_path / "retorno.txt"
+
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        file.write(newline.join(lines) + ending)
+
+    return str(path)
+
+
+def test_get_data(return_path, lines):
+    data = TextAR().get_data(return_path)
+
+    assert data["header"]["codigo_do_cliente"] == 1234
+    assert data["header"]["data_do_movimento"] == "05/01/2024"
+    assert len(data["detail"]) == COUNT
+    assert [detail["numero_sequencial_registro"] for detail in data["detail"]] == list(range(2, COUNT + 2))
+    assert data["detail"][0]["conteudo"] == "AR 0"
+    assert data["trailer"]["quantidade_de_registros"] == COUNT
+
+
+def test_get_data_records_match_dicts(return_path):
+    data = TextAR().get_data(return_path)
+    records = TextAR().get_data(return_path, records=True)
+
+    assert records["header"].to_dict() == data["header"]
+    assert [detail.to_dict() for detail in records["detail"]] == data["detail"]
+    assert records["trailer"].to_dict() == data["trailer"]
+
+
+def test_get_columns_match_get_data(return_path):
+    details = TextAR().get_data(return_path)["detail"]
+    columns = TextAR().get_data(return_path, columnar=True)
+
+    assert set(columns) == set(details[0])
+
+    for name, values in columns.items():
+        if name == "data_da_entrega_do_ar":
+            values = ["/".join(reversed(value.split("-"))) for value in np.datetime_as_string(values)]
+
+        assert list(values) == [detail[name] for detail in details], name
+
+
+def test_get_columns_rejects_variable_length_records(tmp_path, lines, newline):
+    path = tmp_path / "retorno.txt"
+
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        file.write(newline.join([lines[0], lines[1][:-1]] + lines[2:]) + newline)
+
+    with pytest.raises(ValueError, match="tamanho variável"):
+        TextAR().get_columns(str(path))
+
+
+def test_empty_and_missing_files(tmp_path):
+    path = tmp_path / "vazio.txt"
+    path.write_bytes(b"")
+
+    assert TextAR().get_data(str(path)) == {"header": {}, "detail": [], "trailer": {}}
+    assert TextAR().get_data(str(tmp_path / "ausente.txt")) is None
+
+
+def test_invalid_record_reports_line(tmp_path, lines):
+    path = tmp_path / "retorno.txt"
+    path.write_text("\n".join([lines[0], lines[1][:86] + "2024AB01" + lines[1][94:]]), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="linha 2"):
+        TextAR().get_data(str(path))
@@ -0,0 +1,246 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import token_ecidade
+
+
+class StubECidade(BaseHTTPRequestHandler):
+    "e-Cidade de teste: registra a porta do cliente de cada requisição e responde com o status configurado."
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests.append((self.path, self.client_address[1]))
+
+        if self.path == "/oauth/token":
+            self.server.tokens.append(f"token-{len(self.server.tokens) + 1}")
+
+            status, body = 200, {"access_token": self.server.tokens[-1], "expires_in": 3600}
+        else:
+            token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+            self.server.authorizations.append(token)
+
+            if token in self.server.revoked:
+                status, body = 401, {"error": True, "message": "Token inválido."}
+            else:
+                status, body = self.server.inclusion_status, {"error": False, "data": {"erro": False}}
+
+        payload = json.dumps(body).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def ecidade(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubECidade)
+    server.requests = []
+    server.tokens = []
+    server.authorizations = []
+    server.revoked = set()
+    server.inclusion_status = 200
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setenv("ECIDADE_BASE", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setenv("OAUTH_TOKEN_URI", "/oauth/token")
+    monkeypatch.setenv("ECIDADE_INCLUSAO", "/inclusao")
+    monkeypatch.setattr(token_ecidade, "session", token_ecidade.create_session(backoff_factor=0))
+    monkeypatch.setattr(token_ecidade, "inclusion_session", token_ecidade.create_session(backoff_factor=0, idempotent=False))
+    monkeypatch.setattr(token_ecidade, "token_cache", token_ecidade.TokenCache())
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def inclusions(server):
+    return [port for path, port in server.requests if path == "/inclusao"]
+
+
+def test_include_reuses_connection(ecidade):
+    for _ in range(5):
+        assert token_ecidade.include({"ar": 1})["status_code"] == 200
+
+    ports = inclusions(ecidade)
+
+    assert len(ports) == 5
+    assert len(set(ports)) == 1
+
+
+@pytest.mark.parametrize("status", [502, 504])
+def test_include_does_not_retry_after_request_was_sent(ecidade, status):
+    ecidade.inclusion_status = status
+
+    assert token_ecidade.include({"ar": 1})["status_code"] == status
+    assert len(inclusions(ecidade)) == 1
+
+
+def test_include_retries_unavailable(ecidade):
+    ecidade.inclusion_status = 503
+
+    assert token_ecidade.include({"ar": 1})["status_code"] == 503
+    assert len(inclusions(ecidade)) == token_ecidade._max_retries + 1
+
+
+def test_include_does_not_retry_read_timeout(ecidade, monkeypatch):
+    monkeypatch.setattr(token_ecidade, "_request_timeout", 0.2)
+
+    handle = StubECidade.do_POST
+
+    def slow_post(self):
+        if self.path == "/inclusao":
+            threading.Event().wait(0.5)
+
+        handle(self)
+
+    monkeypatch.setattr(StubECidade, "do_POST", slow_post)
+
+    assert token_ecidade.include({"ar": 1}) is None
+
+    threading.Event().wait(0.5)
+
+    assert len(inclusions(ecidade)) == 1
+
+
+def test_include_many_shares_concurrency_limit(ecidade, monkeypatch):
+    active = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    handle = StubECidade.do_POST
+
+    def tracked_post(self):
+        if self.path != "/inclusao":
+            return handle(self)
+
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+
+        threading.Event().wait(0.05)
+
+        with lock:
+            active["now"] -= 1
+
+        handle(self)
+
+    monkeypatch.setattr(StubECidade, "do_POST", tracked_post)
+
+    batches = [[{"ar": number} for number in range(10)] for _ in range(3)]
+    results = [None] * len(batches)
+
+    def run(index):
+        results[index] = token_ecidade.include_many(batches[index])
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(len(batches))]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert all(len(result) == 10 and all(item["status_code"] == 200 for item in result) for result in results)
+    assert active["max"] <= token_ecidade._max_concurrency
+
+
+def test_include_many_reports_transport_errors_in_order(ecidade, monkeypatch):
+    post = token_ecidade.inclusion_session.post
+
+    def failing_post(url, json=None, **kwargs):
+        if json["ar"] % 2:
+            raise requests.ConnectionError(f"falha no AR {json['ar']}")
+
+        return post(url, json=json, **kwargs)
+
+    monkeypatch.setattr(token_ecidade.inclusion_session, "post", failing_post)
+
+    result = token_ecidade.include_many([{"ar": number} for number in range(6)])
+
+    assert [item["status_code"] for item in result] == [200, None, 200, None, 200, None]
+
+    for number, item in enumerate(result):
+        if number % 2:
+            assert item["data"]["error"] is True
+            assert f"falha no AR {number}" in item["data"]["message"]
+        else:
+            assert item["data"] == {"error": False, "data": {"erro": False}}
+
+
+def test_token_cache_fetches_once_for_concurrent_callers():
+    calls = []
+    lock = threading.Lock()
+
+    def slow_fetch():
+        with lock:
+            calls.append(None)
+
+        threading.Event().wait(0.1)
+
+        return {"access_token": f"token-{len(calls)}", "expires_in": 3600}
+
+    cache = token_ecidade.TokenCache(fetch=slow_fetch, margin=60)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(10)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["token-1"] * 10
+
+
+def test_token_cache_refreshes_before_expiry():
+    responses = iter([{"access_token": "token-1", "expires_in": 30}, {"access_token": "token-2", "expires_in": 3600}])
+    cache = token_ecidade.TokenCache(fetch=lambda: next(responses), margin=60)
+
+    # Expira dentro da margem de renovação: não é reaproveitado
+    assert cache.get() == "token-1"
+    assert cache.get() == "token-2"
+    assert cache.get() == "token-2"
+
+
+def test_token_cache_invalidate_keeps_newer_token():
+    responses = iter([{"access_token": "token-1", "expires_in": 3600}, {"access_token": "token-2", "expires_in": 3600}])
+    cache = token_ecidade.TokenCache(fetch=lambda: next(responses), margin=60)
+
+    assert cache.get() == "token-1"
+
+    cache.invalidate("token-1")
+
+    assert cache.get() == "token-2"
+
+    # Outra thread ainda com o token antigo não descarta o novo
+    cache.invalidate("token-1")
+
+    assert cache.get() == "token-2"
+
+
+def test_include_refreshes_revoked_token(ecidade):
+    assert token_ecidade.include({"ar": 1})["status_code"] == 200
+
+    ecidade.revoked.add("token-1")
+
+    assert token_ecidade.include({"ar": 2})["status_code"] == 200
+    assert ecidade.tokens == ["token-1", "token-2"]
+    assert ecidade.authorizations == ["token-1", "token-1", "token-2"]
+
+    # O novo token fica em cache para as inclusões seguintes
+    assert token_ecidade.include({"ar": 3})["status_code"] == 200
+    assert ecidade.authorizations[-1] == "token-2"
+    assert len(ecidade.tokens) == 2
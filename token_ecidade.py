@@ -1,6 +1,14 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import count_error, timed
+from tracing import span
 
 if "FLASK_APP" not in os.environ:
     from dotenv import load_dotenv
@@ -9,6 +17,67 @@ if "FLASK_APP" not in os.environ:
 
 _request_timeout = int(os.getenv("FLASK_CONNECTION_TIMEOUT", 10))
 
+_token_refresh_margin = int(os.getenv("OAUTH_TOKEN_REFRESH_MARGIN", 60))
+
+_pool_size = int(os.getenv("ECIDADE_POOL_SIZE", 10))
+
+_max_retries = int(os.getenv("ECIDADE_MAX_RETRIES", 3))
+
+_retry_backoff = float(os.getenv("ECIDADE_RETRY_BACKOFF", 0.5))
+
+_max_concurrency = int(os.getenv("ECIDADE_MAX_CONCURRENCY", 4))
+
+def create_session(pool_size=_pool_size, max_retries=_max_retries, backoff_factor=_retry_backoff, idempotent=True):
+    """
+    Cria uma sessão HTTP com pool de conexões keep-alive e novas tentativas.
+
+    Requisições idempotentes (ex.: obtenção do token) são repetidas em falhas de conexão, de leitura
+    e em 502/503/504. As demais (ex.: inclusão do AR) só são repetidas quando a requisição
+    comprovadamente não foi processada: falha ao conectar ou 503; nunca após um timeout de leitura
+    ou um 502/504, que poderiam incluir o mesmo AR duas vezes.
+
+    Args:
+        pool_size (int, optional): Quantidade máxima de conexões mantidas por host.
+        max_retries (int, optional): Quantidade máxima de novas tentativas por requisição.
+        backoff_factor (float, optional): Fator do intervalo exponencial entre as tentativas.
+        idempotent (bool, optional): Se as requisições da sessão podem ser repetidas com segurança.
+
+    Returns:
+        requests.Session: A sessão configurada.
+    """
+    if idempotent:
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=None,
+            raise_on_status=False
+        )
+    else:
+        retry = Retry(
+            total=max_retries,
+            read=0,
+            other=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=(503,),
+            allowed_methods=None,
+            raise_on_status=False
+        )
+
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+session = create_session()
+"Sessão das requisições idempotentes ao e-Cidade (token)"
+
+inclusion_session = create_session(idempotent=False)
+"Sessão das inclusões de AR, sem novas tentativas após o envio da requisição"
+
 def get_token():
     data = {
         "client_id": os.getenv("OAUTH_CLIENT_ID"),
@@ -19,40 +88,155 @@ def get_token():
     try:
         url = os.getenv("ECIDADE_BASE") + os.getenv("OAUTH_TOKEN_URI")
 
-        response = requests.post(url, data, timeout=_request_timeout)
+        with timed("token"):
+            response = session.post(url, data, timeout=_request_timeout)
 
         if response.status_code == 200:
             return response.json()
         else:
+            count_error("token", f"HTTP {response.status_code}")
+
             return None
     except:
         return None
 
-def include(data):
-    token = get_token()
+class TokenCache():
+    "Mantém o access_token em cache até pouco antes de expirar, compartilhado entre threads."
 
-    if token is None:
-        return {
-            "data": {"error": True, "message": "Não foi possível obter o Token."},
-            "status_code": 503
-        }
+    def __init__(self, fetch=get_token, margin=_token_refresh_margin):
+        self._fetch = fetch
+        self._margin = margin
+        self._lock = Lock()
+        self._entry = (None, 0)
 
-    token = token.get("access_token")
+    def _cached(self):
+        token, expires_at = self._entry
 
-    url = os.getenv("ECIDADE_BASE") + os.getenv("ECIDADE_INCLUSAO")
+        return token if token is not None and time.monotonic() < expires_at else None
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
+    def get(self):
+        "Retorna o token em cache ou obtém um novo (apenas uma thread faz a requisição)."
+        token = self._cached()
 
-    try:
-        response = requests.post(url, headers=headers, json=data, timeout=_request_timeout)
+        if token is not None:
+            return token
+
+        with self._lock:
+            token = self._cached()
+
+            if token is not None:
+                return token
+
+            response = self._fetch()
+
+            if response is None:
+                return None
 
-        return {
-            "data": response.json(),
-            "status_code": response.status_code
+            token = response.get("access_token")
+            expires_in = int(response.get("expires_in") or 0)
+
+            self._entry = (token, time.monotonic() + expires_in - self._margin)
+
+            return token
+
+    def invalidate(self, token=None):
+        "Descarta o token em cache (apenas se ainda for o token informado, quando houver)."
+        with self._lock:
+            if token is None or self._entry[0] == token:
+                self._entry = (None, 0)
+
+token_cache = TokenCache()
+
+def include(data, correlation_id=None, raise_errors=False):
+    """
+    Inclui um AR no e-Cidade.
+
+    Args:
+        data (dict): Payload de inclusão (saída de FormData.get_data()).
+        correlation_id (str, optional): Identificador do envio, enviado no cabeçalho X-Correlation-ID.
+        raise_errors (bool, optional): Levanta a exceção da falha de comunicação em vez de retornar None.
+
+    Returns:
+        dict: {"data": resposta, "status_code": código HTTP} ou None se não houver comunicação.
+    """
+    with span("include", correlation_id) as record:
+        token = token_cache.get()
+
+        if token is None:
+            count_error("inclusion", "token")
+            record["status"] = "error"
+
+            return {
+                "data": {"error": True, "message": "Não foi possível obter o Token."},
+                "status_code": 503
+            }
+
+        url = os.getenv("ECIDADE_BASE") + os.getenv("ECIDADE_INCLUSAO")
+
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
         }
 
-    except Exception:
-        return None
\ No newline at end of file
+        if correlation_id is not None:
+            headers["X-Correlation-ID"] = correlation_id
+
+        try:
+            with timed("inclusion"):
+                response = inclusion_session.post(url, headers=headers, json=data, timeout=_request_timeout)
+
+            # Token expirado ou revogado no servidor: descarta o cache e tenta novamente uma vez
+            if response.status_code == 401:
+                token_cache.invalidate(token)
+                token = token_cache.get()
+
+                if token is not None:
+                    headers["Authorization"] = f"Bearer {token}"
+
+                    with timed("inclusion"):
+                        response = inclusion_session.post(url, headers=headers, json=data, timeout=_request_timeout)
+
+            record["status_code"] = response.status_code
+
+            return {
+                "data": response.json(),
+                "status_code": response.status_code
+            }
+
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = e.__str__()
+
+            if raise_errors:
+                raise
+
+            return None
+
+_inclusion_executor = ThreadPoolExecutor(max_workers=max(1, _max_concurrency), thread_name_prefix="inclusion")
+"Pool compartilhado das inclusões em lote: limita as requisições simultâneas ao e-Cidade entre todos os envios"
+
+def include_many(data, correlation_id=None):
+    """
+    Inclui vários ARs no e-Cidade de forma concorrente.
+
+    As inclusões de todos os envios em lote compartilham o mesmo pool, limitado a
+    ECIDADE_MAX_CONCURRENCY requisições simultâneas.
+
+    Args:
+        data (list): Payloads de inclusão (saída de FormData.get_data()).
+        correlation_id (str, optional): Identificador do envio, repassado a cada inclusão.
+
+    Returns:
+        list: Um resultado por payload, na mesma ordem da entrada, no formato de include(). Uma falha
+        de comunicação vira um resultado de erro com "status_code" None e a mensagem da exceção.
+    """
+    def _include(item):
+        try:
+            return include(item, correlation_id, raise_errors=True)
+        except Exception as e:
+            return {
+                "data": {"error": True, "message": f"Não foi possível se comunicar com o e-Cidade: {e}"},
+                "status_code": None
+            }
+
+    return list(_inclusion_executor.map(_include, data))
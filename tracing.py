@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock
+
+logger = logging.getLogger("ar.trace")
+
+_configured = False
+
+_configure_lock = Lock()
+
+def _configure():
+    "Configura o log dos spans na primeira utilização (TRACE_LOG=false desativa)."
+    global _configured
+
+    if _configured:
+        return
+
+    with _configure_lock:
+        if _configured:
+            return
+
+        if os.getenv("TRACE_LOG", "true").lower() == "true":
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+        else:
+            logger.setLevel(logging.WARNING)
+
+        logger.propagate = False
+
+        _configured = True
+
+def new_correlation_id():
+    "Gera o identificador que acompanha um envio do Socket.IO ao e-Cidade e ao FTP."
+    return uuid.uuid4().hex
+
+@contextmanager
+def span(name, correlation_id=None, **fields):
+    """
+    Registra a duração de uma etapa do envio em uma linha JSON, com o correlation_id do envio.
+
+    Args:
+        name (str): Nome da etapa (ex.: "include", "generate", "ftp_upload").
+        correlation_id (str, optional): Identificador do envio.
+        **fields: Informações adicionais registradas junto com o span.
+
+    Yields:
+        dict: Os campos do span, que podem ser complementados durante a etapa.
+    """
+    _configure()
+
+    record = {"timestamp": datetime.now().isoformat(timespec="milliseconds"), "correlation_id": correlation_id, "span": name, **fields}
+    start = time.perf_counter()
+
+    try:
+        yield record
+
+        record.setdefault("status", "ok")
+    except BaseException as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+        logger.info(json.dumps(record, ensure_ascii=False, default=str))
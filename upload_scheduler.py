@@ -0,0 +1,136 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
+
+if "FLASK_APP" not in os.environ:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+class CancelToken():
+    "Sinal de cancelamento de um único envio."
+
+    def __init__(self):
+        self._event = Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class UploadJob():
+    "Envio agendado para um cliente."
+
+    def __init__(self, client_id, target, args):
+        self.client_id = client_id
+        self.target = target
+        self.args = args
+        self.token = CancelToken()
+        self.future = None
+
+
+class UploadScheduler():
+    """
+    Agenda os envios (inclusão, geração e upload) em um pool limitado de workers, separando o
+    cancelamento por cliente.
+
+    Cada envio recebe seu próprio CancelToken como último argumento. Enquanto aguardam um
+    worker livre, os clientes são avisados da posição de cada envio na fila por 'on_queue'.
+
+    Com o monkey-patching do gevent (app.py), os workers são greenlets: o pool continua limitado
+    a 'max_workers' e os eventos emitidos pelos envios são entregues sem atraso.
+    """
+
+    def __init__(self, max_workers=None, on_queue=None):
+        max_workers = max_workers or int(os.getenv("UPLOAD_MAX_WORKERS", 4))
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+        self._max_workers = max_workers
+        self._lock = Lock()
+        self._pending = []
+        self._running = 0
+        self._jobs = {}
+        self._on_queue = on_queue
+        self._closed = False
+
+    def _notify_positions(self):
+        if self._on_queue is None:
+            return
+
+        with self._lock:
+            # Com workers livres os envios pendentes começam em seguida, sem esperar na fila
+            if self._running < self._max_workers:
+                return
+
+            pending = [(job.client_id, position) for position, job in enumerate(self._pending, 1)]
+
+        for client_id, position in pending:
+            self._on_queue(client_id, position)
+
+    def _run(self, job):
+        with self._lock:
+            self._pending.remove(job)
+            self._running += 1
+
+        self._notify_positions()
+
+        try:
+            if not job.token.cancelled:
+                return job.target(*job.args, job.token)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+                jobs = self._jobs.get(job.client_id)
+
+                if jobs is not None:
+                    jobs.discard(job)
+
+                    if not jobs:
+                        del self._jobs[job.client_id]
+
+    def submit(self, client_id, target, *args):
+        "Agenda 'target(*args, cancel_token)' para o cliente informado."
+        job = UploadJob(client_id, target, args)
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("O agendador de envios foi encerrado.")
+
+            self._pending.append(job)
+            self._jobs.setdefault(client_id, set()).add(job)
+
+            job.future = self._executor.submit(self._run, job)
+
+        self._notify_positions()
+
+        return job
+
+    def cancel(self, client_id):
+        "Cancela os envios em andamento e na fila de um único cliente."
+        with self._lock:
+            jobs = list(self._jobs.get(client_id, ()))
+
+        for job in jobs:
+            job.token.cancel()
+
+        return len(jobs)
+
+    def queue_size(self):
+        with self._lock:
+            return len(self._pending)
+
+    def shutdown(self, wait=True):
+        "Cancela todos os envios e encerra o pool de workers."
+        with self._lock:
+            self._closed = True
+            jobs = [job for client_jobs in self._jobs.values() for job in client_jobs]
+
+        for job in jobs:
+            job.token.cancel()
+
+        self._executor.shutdown(wait=wait)
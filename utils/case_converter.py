@@ -1,4 +1,33 @@
 import re
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+
+_key_cache_size = 1024
+"Quantidade máxima de chaves (e de esquemas de chaves) memorizadas por conversão"
+
+@lru_cache(maxsize=_key_cache_size)
+def _to_camel_case(input_str):
+    words = re.split(r"_|-", input_str)
+    return words[0] + ''.join(x.title() for x in words[1:])
+
+@lru_cache(maxsize=_key_cache_size)
+def _case_separator(input_str, separator):
+    try:
+        input_str = re.sub(r'([a-z])([A-Z])', r'\1' + separator + r'\2', input_str)
+        words = re.findall(r'[a-zA-Z]+', input_str)
+        return separator.join(words).lower()
+    except:
+        return input_str
+
+@lru_cache(maxsize=_key_cache_size)
+def _conversion_plan(key_converter, keys):
+    "Chaves convertidas de um esquema (tupla de chaves na ordem do dicionário), calculadas uma única vez."
+    return tuple(key_converter(key) for key in keys)
+
+@lru_cache(maxsize=_key_cache_size)
+def _reverse_plan(key_converter, keys):
+    "Chave convertida -> chave original de um esquema (usado pelas visões)."
+    return dict(zip(_conversion_plan(key_converter, keys), keys))
 
 
 class CaseConverter:
@@ -21,8 +50,7 @@ class CaseConverter:
             >>> CaseConverter.to_camel_case("hello_world_example")
             'helloWorldExample'
         """
-        words = re.split(r"_|-", input_str)
-        return words[0] + ''.join(x.title() for x in words[1:])
+        return _to_camel_case(input_str)
 
     @staticmethod
     def to_kebab_case(input_str):
@@ -75,32 +103,131 @@ class CaseConverter:
             'hello-world-example'
         """
         try:
-            input_str = re.sub(r'([a-z])([A-Z])', r'\1' + separator + r'\2', input_str)
-            words = re.findall(r'[a-zA-Z]+', input_str)
-            return separator.join(words).lower()
-        except:
-            return input_str
+            return _case_separator(input_str, separator)
+        except TypeError:
+            # Chaves não hasheáveis não passam pelo cache
+            return _case_separator.__wrapped__(input_str, separator)
 
     @staticmethod
-    def convert_keys(data, key_converter):
+    def convert_keys(data, key_converter, in_place=False):
         """
         Recursivamente converte as chaves de um dicionário (ou listas de dicionários) usando um conversor de chaves.
 
+        As chaves convertidas de cada esquema (conjunto ordenado de chaves de um dicionário) são
+        calculadas uma única vez e reutilizadas nos demais dicionários com o mesmo esquema.
+
         Args:
             data (dict or list): Os dados para os quais as chaves serão convertidas.
             key_converter (function): A função que converte as chaves.
+            in_place (bool, optional): Altera os próprios dicionários e listas em vez de criar cópias.
 
         Returns:
             dict or list: Os dados com as chaves convertidas.
 
         Example:
             >>> data = {"first_name": "John", "last_name": "Doe"}
-            >>> CaseConverter.convert_keys(data, aseConverter.to_camel_case)
+            >>> CaseConverter.convert_keys(data, CaseConverter.to_camel_case)
             {'firstName': 'John', 'lastName': 'Doe'}
         """
         if isinstance(data, list):
+            if in_place:
+                for index, item in enumerate(data):
+                    data[index] = CaseConverter.convert_keys(item, key_converter, True)
+
+                return data
+
             return [CaseConverter.convert_keys(item, key_converter) for item in data]
         elif isinstance(data, dict):
-            return {key_converter(key): CaseConverter.convert_keys(value, key_converter) for key, value in data.items()}
+            keys = _conversion_plan(key_converter, tuple(data))
+            values = [CaseConverter.convert_keys(value, key_converter, in_place) for value in data.values()]
+
+            if in_place:
+                data.clear()
+                data.update(zip(keys, values))
+
+                return data
+
+            return dict(zip(keys, values))
         else:
             return data
+
+    @staticmethod
+    def view(data, key_converter):
+        """
+        Retorna uma visão somente leitura dos dados com as chaves convertidas sob demanda.
+
+        Nada é copiado: apenas os dicionários e listas efetivamente acessados são envolvidos
+        por uma visão, o que evita converter respostas grandes que são lidas apenas em parte.
+
+        Args:
+            data (dict or list): Os dados originais.
+            key_converter (function): A função que converte as chaves.
+
+        Returns:
+            KeyConverterView or KeyConverterListView: A visão (ou o próprio valor, se não for dict/list).
+
+        Example:
+            >>> view = CaseConverter.view({"first_name": "John"}, CaseConverter.to_camel_case)
+            >>> view["firstName"]
+            'John'
+        """
+        if isinstance(data, dict):
+            return KeyConverterView(data, key_converter)
+
+        if isinstance(data, list):
+            return KeyConverterListView(data, key_converter)
+
+        return data
+
+
+class KeyConverterView(Mapping):
+    "Visão de um dicionário com as chaves convertidas por 'key_converter' (ver CaseConverter.view)."
+
+    __slots__ = ("_data", "_key_converter", "_keys")
+
+    def __init__(self, data, key_converter):
+        self._data = data
+        self._key_converter = key_converter
+        self._keys = _reverse_plan(key_converter, tuple(data))
+
+    def __getitem__(self, key):
+        return CaseConverter.view(self._data[self._keys[key]], self._key_converter)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self):
+        "Materializa a visão em um dicionário (ex.: para serialização em JSON)."
+        return CaseConverter.convert_keys(self._data, self._key_converter)
+
+
+class KeyConverterListView(Sequence):
+    "Visão de uma lista cujos dicionários têm as chaves convertidas sob demanda."
+
+    __slots__ = ("_data", "_key_converter")
+
+    def __init__(self, data, key_converter):
+        self._data = data
+        self._key_converter = key_converter
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return KeyConverterListView(self._data[index], self._key_converter)
+
+        return CaseConverter.view(self._data[index], self._key_converter)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_list()!r})"
+
+    def to_list(self):
+        "Materializa a visão em uma lista (ex.: para serialização em JSON)."
+        return CaseConverter.convert_keys(self._data, self._key_converter)
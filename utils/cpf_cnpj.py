@@ -1,5 +1,22 @@
 import re
+from operator import mul
 
+_non_numeric = re.compile(r'[^0-9]')
+
+# Pesos de cada dígito verificador: o dígito da posição len(pesos) é conferido com a soma
+# ponderada dos dígitos anteriores
+_cpf_weights = (tuple(range(10, 1, -1)), tuple(range(11, 1, -1)))
+_cnpj_weights = ((5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2), (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+
+# Dígito verificador esperado para cada resto da soma ponderada por 11
+_cpf_check_digits = tuple((remainder * 10) % 11 % 10 for remainder in range(11))
+_cnpj_check_digits = tuple(0 if remainder < 2 else 11 - remainder for remainder in range(11))
+
+_documents = {
+    11: (_cpf_weights, _cpf_check_digits),
+    14: (_cnpj_weights, _cnpj_check_digits)
+}
+"Tamanho do documento -> (pesos, dígitos verificadores por resto)"
 
 def remove_non_numeric_characters(input_str):
     """
@@ -11,53 +28,52 @@ def remove_non_numeric_characters(input_str):
     Returns:
         str: A string resultante após a remoção dos caracteres não numéricos.
     """
-    return re.sub(r'[^0-9]', '', input_str)
+    return _non_numeric.sub('', input_str)
 
-def validate_cpf(cpf):
-    """
-    Valida um número de CPF.
+def _normalize(document):
+    "Remove a pontuação e completa com zeros à direita até o tamanho de CPF (11) ou CNPJ (14)."
+    document = remove_non_numeric_characters(document)
+    length = len(document)
 
-    Args:
-        cpf (str): O número de CPF a ser validado.
+    if length < 11:
+        return document.ljust(11, "0")
 
-    Returns:
-        bool: True se o CPF for válido, False caso contrário.
-    """
-    cpf = remove_non_numeric_characters(cpf)
-    v1 = 0
-    v2 = 0
-    aux = False
+    if 11 < length < 14:
+        return document.ljust(14, "0")
 
-    for i in range(1, len(cpf)):
-        if cpf[i - 1] != cpf[i]:
-            aux = True
+    return document
 
-    if not aux:
+def _validate_digits(digits, weights, check_digits):
+    "Valida uma sequência de dígitos (inteiros) contra a tabela de pesos do documento."
+    # Sequências de um único dígito repetido (ex.: 000.000.000-00) não são válidas
+    if digits.count(digits[0]) == len(digits):
         return False
 
-    for i in range(len(cpf) - 2):
-        v1 += int(cpf[i]) * (10 - i)
+    for position_weights in weights:
+        total = sum(map(mul, digits, position_weights))
 
-    v1 = ((v1 * 10) % 11)
+        if check_digits[total % 11] != digits[len(position_weights)]:
+            return False
 
-    if v1 == 10:
-        v1 = 0
+    return True
 
-    if v1 != int(cpf[9]):
+def _validate(document, length):
+    if len(document) != length:
         return False
 
-    for i in range(len(cpf) - 1):
-        v2 += int(cpf[i]) * (11 - i)
+    return _validate_digits([byte - 48 for byte in document.encode("ascii")], *_documents[length])
 
-    v2 = ((v2 * 10) % 11)
+def validate_cpf(cpf):
+    """
+    Valida um número de CPF.
 
-    if v2 == 10:
-        v2 = 0
+    Args:
+        cpf (str): O número de CPF a ser validado.
 
-    if v2 != int(cpf[10]):
-        return False
-    else:
-        return True
+    Returns:
+        bool: True se o CPF for válido, False caso contrário.
+    """
+    return _validate(remove_non_numeric_characters(cpf), 11)
 
 def validate_cnpj(cnpj):
     """
@@ -69,83 +85,64 @@ def validate_cnpj(cnpj):
     Returns:
         bool: True se o CNPJ for válido, False caso contrário.
     """
-    cnpj = remove_non_numeric_characters(cnpj)
-    v1 = 0
-    v2 = 0
-    aux = False
-
-    for i in range(1, len(cnpj)):
-        if cnpj[i - 1] != cnpj[i]:
-            aux = True
-
-    if not aux:
-        return False
+    return _validate(remove_non_numeric_characters(cnpj), 14)
 
-    p1 = 5
-    p2 = 13
-    for i in range(len(cnpj) - 2):
-        if p1 >= 2:
-            v1 += int(cnpj[i]) * p1
-        else:
-            v1 += int(cnpj[i]) * p2
-        p1 -= 1
-        p2 -= 1
+def validate_document(document):
+    """
+    Valida um documento (CPF ou CNPJ).
 
-    v1 = (v1 % 11)
+    Args:
+        document (str): O número de CPF ou CNPJ a ser validado.
 
-    if v1 < 2:
-        v1 = 0
-    else:
-        v1 = (11 - v1)
+    Returns:
+        bool: True se o documento for válido, False caso contrário.
+    """
+    document = _normalize(document)
+    length = len(document)
 
-    if v1 != int(cnpj[12]):
+    if length not in _documents:
         return False
 
-    p1 = 6
-    p2 = 14
-    for i in range(len(cnpj) - 1):
-        if p1 >= 2:
-            v2 += int(cnpj[i]) * p1
-        else:
-            v2 += int(cnpj[i]) * p2
-        p1 -= 1
-        p2 -= 1
-
-    v2 = (v2 % 11)
-
-    if v2 < 2:
-        v2 = 0
-    else:
-        v2 = (11 - v2)
-
-    if v2 != int(cnpj[13]):
-        return False
-    else:
-        return True
+    return _validate(document, length)
 
-def validate_document(document):
+def validate_many(documents):
     """
-    Valida um documento (CPF ou CNPJ).
+    Valida uma lista de documentos (CPF ou CNPJ), com o mesmo resultado de validate_document.
+
+    Os documentos de mesmo tamanho são validados em lote com NumPy, quando disponível.
 
     Args:
-        document (str): O número de CPF ou CNPJ a ser validado.
+        documents (list): Os números de CPF ou CNPJ a serem validados.
 
     Returns:
-        bool: True se o documento for válido, False caso contrário.
+        list: Um bool por documento, na mesma ordem da entrada.
     """
-    document = remove_non_numeric_characters(document)
-    length = len(document)
+    try:
+        import numpy as np
+    except ImportError:
+        return [validate_document(document) for document in documents]
 
-    if length == 14:
-        return validate_cnpj(document)
+    documents = [_normalize(document) for document in documents]
+    results = np.zeros(len(documents), dtype=bool)
 
-    if length == 11:
-        return validate_cpf(document)
+    for length, (weights, check_digits) in _documents.items():
+        indexes = [index for index, document in enumerate(documents) if len(document) == length]
 
-    if length < 11:
-        return validate_document(document.ljust(11, "0"))
+        if not indexes:
+            continue
+
+        text = "".join(documents[index] for index in indexes).encode("ascii")
+        digits = np.frombuffer(text, dtype=np.uint8).reshape(-1, length).astype(np.int64) - ord("0")
+        check_digits = np.array(check_digits)
+
+        valid = ~(digits == digits[:, :1]).all(axis=1)
+
+        for position_weights in weights:
+            position = len(position_weights)
+            total = digits[:, :position] @ np.array(position_weights)
+
+            valid &= check_digits[total % 11] == digits[:, position]
 
-    if length < 14:
-        return validate_document(document.ljust(14, "0"))
+        results[indexes] = valid
 
-    return False
\ No newline at end of file
+    return results.tolist()
@@ -1,59 +1,115 @@
+from functools import lru_cache
+
+from utils.cpf_cnpj import remove_non_numeric_characters
+
+_named_masks = {
+    "TELEFONE": "(##) ####-####",
+    "CELULAR": "(##) #####-####",
+    "CNPJ": "##.###.###/####-##",
+    "CPF": "###.###.###-##",
+    "CEP": "#####-###"
+}
+
+_auto_masks = {
+    14: "##.###.###/####-##",
+    11: "###.###.###-##",
+    8: "#####-###"
+}
+"Máscara aplicada pelo tamanho da entrada quando nenhuma é informada"
+
+@lru_cache(maxsize=256)
+def compile_mask(mask):
+    """
+    Compila uma máscara em um modelo de str.format com uma posição por '#'.
+
+    Args:
+        mask (str): A máscara com '#' nas posições preenchidas pela entrada.
+
+    Returns:
+        tuple: (modelo, quantidade de posições).
+    """
+    template = mask.replace("{", "{{").replace("}", "}}").replace("#", "{}")
+
+    return template, mask.count("#")
+
+def _resolve_mask(mask):
+    "Retorna (máscara, preencher com zeros) ou None quando a máscara deve ser escolhida pelo tamanho."
+    mask = str(mask)
+
+    if "#" in mask:
+        return mask, False
+
+    named = _named_masks.get(mask.upper())
+
+    return (named, True) if named is not None else None
+
+def _apply(digits, template, slots, zfill=False):
+    if zfill:
+        digits = digits.zfill(slots)
+
+    length = len(digits)
+
+    # Entrada maior que a máscara: os dígitos excedentes são ignorados; menor: os '#' restantes permanecem
+    if length >= slots:
+        return template.format(*digits[:slots])
+
+    return template.format(*digits, *("#" * (slots - length)))
+
+def _digits(input_str):
+    input_str = str(input_str)
+
+    if input_str.isascii() and input_str.isdigit():
+        return input_str
+
+    return remove_non_numeric_characters(input_str)
+
+def _format_auto(digits):
+    mask = _auto_masks.get(len(digits))
+
+    if mask is None:
+        return digits
+
+    return _apply(digits, *compile_mask(mask))
+
 def format_string_with_mask(input_str, mask=None):
     """
     Formata uma string de acordo com uma máscara especificada.
 
     Args:
-        input_str (str): A string a ser formatada.
-        mask (str, optional): A máscara de formatação a ser aplicada (padrão é None).
+        input_str (str): A string a ser formatada (os caracteres não numéricos são descartados).
+        mask (str, optional): A máscara de formatação a ser aplicada (padrão é None). Pode ser uma
+            máscara com '#' ou um dos nomes TELEFONE, CELULAR, CNPJ, CPF e CEP.
 
     Returns:
         str: A string formatada de acordo com a máscara especificada.
     """
-    input_str = str(input_str).replace(r"\D", "")
-    length = len(input_str)
-
-    if not mask:
-        if length == 14:
-            mask = "##.###.###/####-##"
-        elif length == 11:
-            mask = "###.###.###-##"
-        elif length == 8:
-            mask = "#####-###"
-    else:
-        mask = str(mask)
-
-    if mask:
-        if "#" in mask:
-            arr = list(mask)
-
-            for i in range(length):
-                if "#" in arr:
-                    pos = arr.index("#")
-                    arr[pos] = input_str[i]
-
-            mask = ''.join(arr)
-
-            return mask
-        else:
-            obj = {
-                "TELEFONE": "(##) ####-####",
-                "CELULAR": "(##) #####-####",
-                "CNPJ": "##.###.###/####-##",
-                "CPF": "###.###.###-##",
-                "CEP": "#####-###"
-            }
-
-            mask_upper = mask.upper()
-
-            if mask_upper in obj:
-                _mask = obj[mask_upper]
-                length = len(_mask.replace(".", "").replace("-", "").replace("/", "").replace("(", "").replace(")", ""))
-
-                input_str = input_str.zfill(length)
-                mask = _mask
-            else:
-                mask = None
-
-            return format_string_with_mask(input_str, mask)
-
-    return input_str
+    digits = _digits(input_str)
+    resolved = _resolve_mask(mask) if mask else None
+
+    if resolved is None:
+        return _format_auto(digits)
+
+    mask, zfill = resolved
+
+    return _apply(digits, *compile_mask(mask), zfill)
+
+def format_many(values, mask=None):
+    """
+    Formata uma lista de valores (ex.: uma coluna de CEPs ou CPFs) com a mesma máscara.
+
+    Args:
+        values (list): Os valores a serem formatados.
+        mask (str, optional): A máscara, como em format_string_with_mask.
+
+    Returns:
+        list: Os valores formatados, na mesma ordem da entrada.
+    """
+    resolved = _resolve_mask(mask) if mask else None
+
+    if resolved is None:
+        return [_format_auto(_digits(value)) for value in values]
+
+    mask, zfill = resolved
+    template, slots = compile_mask(mask)
+
+    return [_apply(_digits(value), template, slots, zfill) for value in values]
@@ -0,0 +1,148 @@
+import re
+
+_weights = (8, 6, 4, 2, 3, 5, 9, 7)
+"Peso de cada um dos 8 dígitos do número do objeto"
+
+_check_digits = tuple(5 if remainder == 0 else 0 if remainder == 1 else 11 - remainder for remainder in range(11))
+"Dígito verificador para cada resto da soma ponderada por 11"
+
+_max_number = 10 ** 8 - 1
+
+_object_code = re.compile(r'[A-Z]{2}[0-9]{9}BR')
+
+def verification_digit(registration_number):
+    """
+    Calcula o dígito verificador (DV) de um número de objeto dos Correios.
+
+    Args:
+        registration_number (str): O número do objeto, com 1 a 8 dígitos.
+
+    Returns:
+        int: O dígito verificador.
+    """
+    if not (1 <= len(registration_number) <= 8):
+        raise ValueError("O número de registro deve conter de 1 a 8 dígitos.")
+
+    total = sum(int(digit) * weight for digit, weight in zip(registration_number.zfill(8), _weights))
+
+    return _check_digits[total % 11]
+
+def object_code(acronym, number):
+    "Monta o código completo do objeto ({sigla}{número com 8 dígitos}{DV}BR)."
+    number = str(number).zfill(8)
+
+    return f"{acronym}{number}{verification_digit(number)}BR"
+
+def validate_object_code(code):
+    """
+    Valida um código de objeto (ex.: SR123456785BR): formato e dígito verificador.
+
+    Args:
+        code (str): O código do objeto.
+
+    Returns:
+        bool: True se o código for válido, False caso contrário.
+    """
+    if not isinstance(code, str) or not _object_code.fullmatch(code):
+        return False
+
+    return verification_digit(code[2:10]) == int(code[10])
+
+def _check_range(start, count):
+    if start < 0 or count < 0 or start + count - 1 > _max_number:
+        raise ValueError(f"A faixa deve estar entre 0 e {_max_number}.")
+
+def verification_digits(numbers):
+    """
+    Calcula em lote os dígitos verificadores de vários números de objeto (0 a 99999999).
+
+    Args:
+        numbers (list or numpy.ndarray): Os números do objeto (inteiros).
+
+    Returns:
+        numpy.ndarray: Um DV (int64) por número, na mesma ordem.
+    """
+    import numpy as np
+
+    numbers = np.asarray(numbers, dtype=np.int64)
+
+    if numbers.size and (numbers.min() < 0 or numbers.max() > _max_number):
+        raise ValueError("O número de registro deve conter de 1 a 8 dígitos.")
+
+    total = np.zeros(numbers.shape, dtype=np.int64)
+
+    for position, weight in enumerate(_weights):
+        total += numbers // 10 ** (7 - position) % 10 * weight
+
+    return np.array(_check_digits)[total % 11]
+
+def object_codes(acronym, start, count):
+    """
+    Gera os códigos completos de uma faixa de números sequenciais de objetos.
+
+    Args:
+        acronym (str): A sigla do objeto (tipo postal), ex.: "SR".
+        start (int): O primeiro número da faixa.
+        count (int): A quantidade de códigos.
+
+    Returns:
+        list or numpy.ndarray: Os códigos ({sigla}{número}{DV}BR), como array de strings quando
+        o NumPy está disponível e como lista caso contrário.
+    """
+    _check_range(start, count)
+
+    try:
+        import numpy as np
+    except ImportError:
+        return [object_code(acronym, number) for number in range(start, start + count)]
+
+    numbers = np.arange(start, start + count, dtype=np.int64)
+
+    # Matriz de códigos Unicode (8 dígitos + DV por linha), vista como strings de 9 caracteres
+    digits = np.empty((count, 9), dtype=np.uint32)
+
+    for position in range(8):
+        digits[:, position] = numbers // 10 ** (7 - position) % 10 + ord("0")
+
+    digits[:, 8] = verification_digits(numbers) + ord("0")
+
+    return np.char.add(np.char.add(acronym, digits.view("U9")[:, 0]), "BR")
+
+def validate_object_codes(codes):
+    """
+    Valida em lote vários códigos de objeto, com o mesmo resultado de validate_object_code.
+
+    Args:
+        codes (list): Os códigos dos objetos.
+
+    Returns:
+        list: Um bool por código, na mesma ordem da entrada.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return [validate_object_code(code) for code in codes]
+
+    codes = list(codes)
+
+    if not codes:
+        return []
+
+    is_str = np.array([isinstance(code, str) for code in codes])
+    text = np.array([code if isinstance(code, str) else "" for code in codes], dtype=str)
+
+    # Códigos com 13 caracteres, vistos como matriz de códigos Unicode
+    valid = is_str & (np.char.str_len(text) == 13)
+    chars = np.ascontiguousarray(text.astype("U13")).view(np.uint32).reshape(len(codes), 13).astype(np.int64)
+
+    letters = chars[:, :2]
+    digits = chars[:, 2:11] - ord("0")
+
+    valid &= ((letters >= ord("A")) & (letters <= ord("Z"))).all(axis=1)
+    valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+    valid &= (chars[:, 11] == ord("B")) & (chars[:, 12] == ord("R"))
+
+    total = (np.where(valid[:, None], digits[:, :8], 0) * np.array(_weights)).sum(axis=1)
+    valid &= np.array(_check_digits)[total % 11] == digits[:, 8]
+
+    return valid.tolist()